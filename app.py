@@ -1,10 +1,9 @@
 import streamlit as st
 from generator.site_builder import SiteBuilder
-from generator.sanitizer import clean_html, clean_iframe, validate_url
+from generator.artifacts import default_artifact_store
+from generator.sanitizer import validate_url
+from generator.metrics import MetricsCollector, observing
 from datetime import datetime
-import io
-import json
-import hashlib
 import traceback
 
 st.set_page_config(
@@ -97,6 +96,16 @@ with st.sidebar:
     st.divider()
     st.info("Technical Lead: Kiran Deb Mondal\nwww.kaydiemscriptlab.com")
 
+# ---------- Shared builder ----------
+# one warm builder per server process (reruns and sessions share its caches)
+@st.cache_resource
+def get_builder() -> SiteBuilder:
+    return SiteBuilder()
+
+
+builder = get_builder()
+artifacts = default_artifact_store()
+
 # ---------- Main UI inputs ----------
 st.title("🏗️ Kaydiem Titan Supreme Engine v25.5")
 st.caption("Precision Engineering for Local SEO Dominance")
@@ -140,6 +149,11 @@ with tabs[2]:
     custom_hero = st.text_input("Hero Background URL", "")
     custom_feat = st.text_input("Feature Section Image URL", "")
     custom_gall = st.text_input("About Section Image URL", "")
+    optimize_images = st.checkbox(
+        "Optimize images in export",
+        value=False,
+        help="Bundle resized WebP/JPEG variants with srcset and lazy loading instead of hotlinking full-size images.",
+    )
 
     # Hero image preview and fallback info (admin-side)
     if custom_hero:
@@ -149,42 +163,32 @@ with tabs[2]:
         except Exception as e:
             st.warning("Hero image failed to load in admin preview. Check URL. " + str(e))
 
-    # Show the fallback the builder will use (helpful to understand final site)
-    try:
-        builder_for_preview = SiteBuilder()
-        fallback_hero = builder_for_preview._sanitize_context(
-            {
-                "custom_hero": custom_hero,
-                "custom_feat": custom_feat,
-                "custom_gall": custom_gall,
-                "p_color": p_color,
-                "s_color": s_color,
-                "border_rad": border_rad,
-                "h_font": h_font,
-                "b_font": b_font,
-                "h_weight": h_weight,
-                "ls": ls,
-            }
-        ).get("custom_hero")
-        st.caption("Final hero (fallback applied if empty): " + (fallback_hero or "none"))
-    except Exception:
-        pass
+    # Show the hero the builder will use
+    st.caption("Final hero (fallback applied if empty): " + (custom_hero or "none"))
 
 with tabs[3]:
     st.header("🛒 Headless E-commerce Bridge")
     sheet_url = st.text_input("Published CSV Link (Google Sheets export?format=csv)", "")
     st.info("Publish your Google Sheet (File → Publish to web → CSV) and paste the export link here.")
+    product_pages = st.checkbox(
+        "Generate a page per product",
+        value=False,
+        help="Export a static, indexable detail page for every product (listed in sitemap.xml).",
+    )
     # quick server-side CSV parse test
     if st.button("Test CSV Parsing", key="test_csv_btn"):
         try:
-            builder_test = SiteBuilder()
             tmp_ctx = dict(context if "context" in globals() else {})
             tmp_ctx.update({"sheet_url": sheet_url})
-            sanitized = builder_test._sanitize_context(tmp_ctx)
-            products = sanitized.get("products", [])
+            sanitized = builder._sanitize_context(tmp_ctx)
+            products = sanitized.get("products", ())
             if products:
-                st.success(f"Found {len(products)} products")
-                st.dataframe(products)
+                # the whole catalog as compact columns (prices parsed once)
+                table = builder._fetch_products_from_sheet(sheet_url)
+                low, high = table.price_range()
+                priced = f", prices {low:g} to {high:g}" if low is not None else ""
+                st.success(f"Found {len(table)} products{priced} (showing first {len(products)})")
+                st.dataframe([dict(p) for p in products])
             else:
                 st.warning("No products returned. Check sheet URL and publish settings.")
         except Exception as e:
@@ -201,9 +205,7 @@ with tabs[5]:
     priv_body = st.text_area("Full Privacy Policy Content", height=200)
     terms_body = st.text_area("Full Terms & Conditions Content", height=200)
 
-# ---------- Sanitize & build context ----------
-map_iframe = clean_iframe(map_iframe_raw)
-about_txt_clean = clean_html(about_txt)
+# ---------- Build context (the builder sanitizes it, memoized) ----------
 service_list = [s.strip() for s in (biz_serv_text or "").splitlines() if s.strip()]
 area_list = [a.strip() for a in (biz_areas or "").split(",") if a.strip()]
 if prod_url and not validate_url(prod_url):
@@ -223,11 +225,13 @@ context = {
     "seo_d": seo_d or "",
     "biz_key": biz_key or "",
     "biz_serv": service_list,
-    "about_txt": about_txt_clean,
+    "about_txt": about_txt or "",
     "custom_hero": custom_hero or "",
     "custom_feat": custom_feat or "",
     "custom_gall": custom_gall or "",
+    "optimize_images": optimize_images,
     "sheet_url": sheet_url or "",
+    "product_pages": product_pages,
     "testi_raw": testi_raw or "",
     "faq_raw": faq_raw or "",
     "priv_body": priv_body or "",
@@ -241,31 +245,9 @@ context = {
     "ls": ls,
     "layout_dna": layout_dna,
     "gsc_tag_input": gsc_tag_input,
-    "map_iframe": map_iframe or "",
+    "map_iframe": map_iframe_raw or "",
 }
 
-# ---------- Helper: fingerprint to detect context changes ----------
-def context_fingerprint(ctx: dict) -> str:
-    # pick the fields that affect generated site; safe dump
-    pick = {
-        "biz_name": ctx.get("biz_name"),
-        "sheet_url": ctx.get("sheet_url"),
-        "about_txt": ctx.get("about_txt"),
-        "priv_body": ctx.get("priv_body"),
-        "terms_body": ctx.get("terms_body"),
-        "hero_h": ctx.get("hero_h"),
-        "custom_hero": ctx.get("custom_hero"),
-    }
-    raw = json.dumps(pick, sort_keys=True, default=str)
-    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
-
-
-# ---------- Ensure builder in scope ----------
-try:
-    builder
-except NameError:
-    builder = SiteBuilder()
-
 # ---------- Instant Preview (robust) ----------
 st.markdown("## ⚡ Instant Preview")
 st.markdown("Select Page to Preview")
@@ -275,59 +257,100 @@ device = st.radio("Preview device", ["Desktop", "Tablet", "Mobile"], horizontal=
 height_map = {"Desktop": 800, "Tablet": 700, "Mobile": 600}
 preview_height = height_map.get(device, 800)
 
-# Render safely
-preview_html = "<div style='padding:18px'>Preview not available</div>"
-try:
-    if preview_page == "Home":
-        preview_html = builder.render_home(context, is_home=True)
-    elif preview_page == "About":
-        preview_html = builder.render_about(context)
-    elif preview_page == "Contact":
-        preview_html = builder.render_about(context)
-    elif preview_page == "Privacy":
-        preview_html = builder._wrap_basic("Privacy Policy", context.get("priv_body", ""))
-    elif preview_page == "Terms":
-        preview_html = builder._wrap_basic("Terms & Conditions", context.get("terms_body", ""))
-except Exception as e:
-    st.error("Preview rendering error: " + str(e))
-    st.text(traceback.format_exc())
-    preview_html = "<div style='padding:24px;color:#b91c1c;'>Error rendering preview (see details above).</div>"
+live_preview = st.toggle("Live preview", value=True, help="Turn off to refresh the preview only on demand.")
+refresh = st.button("Refresh preview", key="refresh_preview_btn") if not live_preview else False
+preview_files = {"Home": "index.html", "About": "about.html", "Contact": "contact.html", "Privacy": "privacy.html", "Terms": "terms.html"}
+
+# Render safely; previews are cached by the fields each page reads, so unrelated edits are free.
+# With live preview off, each page keeps its last render: field edits wait for a refresh, but
+# switching pages always shows the selected page.
+shown = st.session_state.setdefault("preview_html", {})
+preview_html = shown.get(preview_page) or "<div style='padding:18px'>Preview not available</div>"
+if live_preview or refresh or preview_page not in shown:
+    try:
+        preview_html = builder.preview(preview_files[preview_page], context)
+        shown[preview_page] = preview_html
+    except Exception as e:
+        st.error("Preview rendering error: " + str(e))
+        st.text(traceback.format_exc())
+        preview_html = "<div style='padding:24px;color:#b91c1c;'>Error rendering preview (see details above).</div>"
 
 # Render preview
 st.components.v1.html(preview_html, height=preview_height, scrolling=True)
 
 # ---------- Premium Export (single source of truth, unique keys) ----------
-# Use session_state to cache generated zip and fingerprint to avoid duplicate widgets / re-builds
-if "generated_zip" not in st.session_state:
-    st.session_state["generated_zip"] = None
-if "generated_zip_fp" not in st.session_state:
-    st.session_state["generated_zip_fp"] = None
+# Exports live in the shared on-disk artifact store, keyed by export fingerprint: identical
+# sites exported by any session share one file. session_state only keeps the key.
+if "export_key" not in st.session_state:
+    st.session_state["export_key"] = None
+
+# fingerprint covers every input each exported file reads, so any relevant edit invalidates the ZIP;
+# it is only needed once a ZIP has been prepared
+current_fp = builder.export_fingerprint(context) if st.session_state["export_key"] else None
 
-current_fp = context_fingerprint(context)
+if "build_metrics" not in st.session_state:
+    st.session_state["build_metrics"] = MetricsCollector()
 
 if st.button("🚀 PREPARE ZIP FOR DEPLOY", key="deploy_prepare_btn"):
     try:
-        z_b = io.BytesIO()
-        builder.build_zip(context, z_b)
-        st.session_state["generated_zip"] = z_b.getvalue()
-        st.session_state["generated_zip_fp"] = current_fp
-        st.success("ZIP prepared successfully. Use the download button below.")
+        metrics = st.session_state["build_metrics"]
+        metrics.reset()
+        with observing(metrics):
+            key, _, reused = builder.export_artifact(context, artifacts)
+        st.session_state["export_key"] = current_fp = key
+        if reused:
+            st.success("ZIP ready (an identical export was already prepared). Use the download button below.")
+        else:
+            st.success("ZIP prepared successfully. Use the download button below.")
     except Exception as e:
         st.error("Export failed: " + str(e))
         st.text(traceback.format_exc())
 
-# Only show download if zip prepared and fingerprint matches
-if st.session_state.get("generated_zip") and st.session_state.get("generated_zip_fp") == current_fp:
+# Only show download if zip prepared, still stored and fingerprint matches
+export_key = st.session_state.get("export_key")
+if export_key and export_key == current_fp and artifacts.get(export_key):
     filename = f"{(context.get('biz_name') or 'site').lower().replace(' ','_')}_final.zip"
+
+    def read_export(key=export_key) -> bytes:
+        # read from the store only when the download is requested; Streamlit then holds the
+        # whole ZIP in its in-memory media storage (the render service streams it instead)
+        with artifacts.open(key) as fh:
+            return fh.read()
+
     st.download_button(
         label="📥 DOWNLOAD PLATINUM ASSET",
-        data=st.session_state["generated_zip"],
+        data=read_export,
         file_name=filename,
         mime="application/zip",
         key="download_zip_btn",
     )
 else:
-    st.info("Prepare the ZIP to enable download (ZIP is cached during this session).")
+    st.info("Prepare the ZIP to enable download (exports are kept in a shared store on the server).")
+
+# ---------- Build diagnostics (last export) ----------
+breakdown = st.session_state["build_metrics"].breakdown()
+if breakdown:
+    with st.expander("🔬 Build diagnostics"):
+        st.dataframe(
+            [
+                {
+                    "Stage": r["stage"],
+                    "Calls": r["calls"],
+                    "Time (ms)": round(r["seconds"] * 1000, 2),
+                    "Bytes": r["bytes"],
+                    "Cache hits": r["cache_hits"],
+                }
+                for r in breakdown
+            ]
+        )
+        st.caption("Fetch and parse run inside sanitize; build is the end-to-end export time.")
+        st.download_button(
+            "Download metrics (Prometheus)",
+            data=st.session_state["build_metrics"].to_prometheus(),
+            file_name="build_metrics.prom",
+            mime="text/plain",
+            key="download_metrics_btn",
+        )
 
 # ---------- Footer note ----------
 st.caption("Auto-saved: " + datetime.utcnow().strftime("%Y-%m-%d %H:%M:%SZ"))
@@ -0,0 +1,342 @@
+"""
+Concurrent-session load test for the builder paths the Streamlit app drives, against a local
+stand-in sheet server with configurable latency and failure rate (fully offline).
+
+    python -m benchmarks.loadtest --sessions 16 --iterations 5
+    python -m benchmarks.loadtest --sessions 50 --duration 60 --latency 0.2 --fail-rate 0.05
+    python -m benchmarks.loadtest --save benchmarks/load.json
+    python -m benchmarks.loadtest --compare benchmarks/load.json --threshold 0.25
+
+Each simulated session is a thread, and all of them share one SiteBuilder, just as Streamlit
+sessions share the app's cached builder. A session repeats an operator's round:
+
+    sanitize   sanitize the context (no custom images, so the hero fallback applies)
+    preview    live preview of every page on every device (each switch is a rerun)
+    csv_test   the "Test CSV Parsing" button: sanitize with the sheet, then the full table
+    export     "Prepare ZIP": stream the ZIP to a temp file and fingerprint it
+
+Between rounds, the session edits a few fields so that previews and exports do real work.
+The report has throughput, p50/p95/p99 latency per operation, error counts, and the peak
+RSS of the process. ``--compare`` exits non-zero if any operation's p95 is more than
+``threshold`` slower than the baseline.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from generator.context import ContextCache
+from generator.feeds import FeedCache
+from generator.incremental import RenderCache
+from generator.site_builder import SiteBuilder
+
+from .run import base_context
+from .sheet_server import SheetServer, synthetic_csv
+
+OPS = ("sanitize", "preview", "csv_test", "export")
+PREVIEW_PAGES = ("index.html", "about.html", "contact.html", "privacy.html", "terms.html")
+# the app only changes the preview frame's height per device, but each switch reruns the script
+DEVICES = ("Desktop", "Tablet", "Mobile")
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Nearest-rank percentile (``q`` in 0..100) of ``values``; 0.0 when empty.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(q / 100 * len(ordered))) - 1]
+
+
+def peak_rss() -> Optional[int]:
+    """
+    Peak resident set size of this process in bytes (None where unavailable, e.g. Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, KiB elsewhere
+
+
+def _csv_test(builder: SiteBuilder, ctx: dict):
+    sanitized = builder._sanitize_context(ctx)
+    if not sanitized.get("products"):
+        raise RuntimeError("no products returned")
+    builder._fetch_products_from_sheet(ctx["sheet_url"]).price_range()
+
+
+def _export(builder: SiteBuilder, ctx: dict, path: str):
+    try:
+        builder.build_zip(ctx, path)
+        builder.export_fingerprint(ctx)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class Session:
+    """
+    One simulated operator: a context of their own and a list of ``(op, seconds, ok)`` samples.
+    """
+
+    def __init__(self, number: int, builder: SiteBuilder, sheet_url: str, workdir: str, ops: Sequence[str]):
+        self.number = number
+        self.builder = builder
+        self.sheet_url = sheet_url
+        self.zip_path = os.path.join(workdir, f"session-{number}.zip")
+        self.ops = ops
+        self.samples: List[Tuple[str, float, bool]] = []
+        self.rounds = 0
+
+    def context(self, round_no: int) -> dict:
+        return base_context(
+            biz_name=f"Session {self.number} Planners",
+            hero_h=f"Crafting Dream Weddings, take {round_no}",
+            about_txt=f"<p>About us, revision {round_no}</p>" * 20,
+            sheet_url=self.sheet_url,
+        )
+
+    def steps(self, ctx: dict) -> Iterator[Tuple[str, Callable[[], object]]]:
+        builder = self.builder
+        if "sanitize" in self.ops:
+            yield "sanitize", lambda: builder._sanitize_context(ctx)
+        if "preview" in self.ops:
+            for page in PREVIEW_PAGES:
+                for _device in DEVICES:
+                    yield "preview", lambda page=page: builder.preview(page, ctx)
+        if "csv_test" in self.ops:
+            yield "csv_test", lambda: _csv_test(builder, ctx)
+        if "export" in self.ops:
+            yield "export", lambda: _export(builder, ctx, self.zip_path)
+
+    def run(self, start: threading.Barrier, iterations: int, duration: Optional[float], think: float, rng: random.Random):
+        start.wait()
+        deadline = time.perf_counter() + duration if duration is not None else None
+        round_no = 0
+        while deadline is not None or round_no < iterations:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            for op, fn in self.steps(self.context(round_no)):
+                t0 = time.perf_counter()
+                try:
+                    fn()
+                    ok = True
+                except Exception:
+                    ok = False
+                self.samples.append((op, time.perf_counter() - t0, ok))
+                if think:
+                    time.sleep(rng.uniform(0, 2 * think))
+            round_no += 1
+            self.rounds = round_no
+
+
+def summarize(sessions: Sequence[Session], wall: float) -> Dict[str, dict]:
+    """
+    Per-operation count, errors, throughput and latency percentiles (seconds).
+    """
+    by_op: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    for session in sessions:
+        for op, seconds, ok in session.samples:
+            by_op.setdefault(op, []).append(seconds)
+            if not ok:
+                errors[op] = errors.get(op, 0) + 1
+    out = {}
+    for op in OPS:
+        times = by_op.get(op)
+        if not times:
+            continue
+        out[op] = {
+            "count": len(times),
+            "errors": errors.get(op, 0),
+            "per_second": len(times) / wall if wall else 0.0,
+            "p50": percentile(times, 50),
+            "p95": percentile(times, 95),
+            "p99": percentile(times, 99),
+            "mean": sum(times) / len(times),
+            "max": max(times),
+        }
+    return out
+
+
+def run(
+    sessions: int = 8,
+    iterations: int = 3,
+    duration: Optional[float] = None,
+    rows: int = 1000,
+    sheets: int = 4,
+    latency: float = 0.0,
+    fail_rate: float = 0.0,
+    think: float = 0.0,
+    feed_ttl: float = 300.0,
+    ops: Sequence[str] = OPS,
+    seed: int = 0,
+    quiet: bool = False,
+) -> dict:
+    """
+    Drive ``sessions`` concurrent sessions for ``iterations`` rounds each (or for ``duration``
+    seconds) and return the report described in the module docstring.
+    """
+    unknown = set(ops) - set(OPS)
+    if unknown:
+        raise ValueError(f"unknown operations: {', '.join(sorted(unknown))}")
+    workdir = tempfile.mkdtemp(prefix="titan-load-")
+    rss_before = peak_rss()
+    try:
+        with SheetServer(latency=latency, fail_rate=fail_rate, seed=seed) as server:
+            for n in range(max(1, sheets)):
+                server.feeds[f"/sheet-{n}.csv"] = synthetic_csv(rows, seed=n)
+            # the app's defaults: stale-while-revalidate feeds
+            feed_cache = FeedCache(cache_dir=os.path.join(workdir, "feeds"), ttl=feed_ttl, background=True)
+            builder = SiteBuilder(context_cache=ContextCache(), render_cache=RenderCache(), feed_cache=feed_cache)
+            pool = [
+                Session(n, builder, server.url(f"/sheet-{n % max(1, sheets)}.csv"), workdir, ops) for n in range(sessions)
+            ]
+            start = threading.Barrier(sessions + 1)
+            threads = [
+                threading.Thread(
+                    target=s.run,
+                    args=(start, iterations, duration, think, random.Random(seed + s.number)),
+                    name=f"load-session-{s.number}",
+                    daemon=True,
+                )
+                for s in pool
+            ]
+            for t in threads:
+                t.start()
+            start.wait()  # every session starts at once
+            t0 = time.perf_counter()
+            for t in threads:
+                t.join()
+            wall = time.perf_counter() - t0
+            feed_cache.wait_refreshes(5)
+            feed_stats = feed_cache.stats()
+            sheet_requests = server.requests
+            feed_cache.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    ops_report = summarize(pool, wall)
+    total = sum(r["count"] for r in ops_report.values())
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "sessions": sessions,
+            "iterations": iterations if duration is None else None,
+            "duration": duration,
+            "rows": rows,
+            "sheets": sheets,
+            "latency": latency,
+            "fail_rate": fail_rate,
+            "think": think,
+        },
+        "wall": wall,
+        "throughput": {
+            "ops_per_second": total / wall if wall else 0.0,
+            "rounds_per_second": sum(s.rounds for s in pool) / wall if wall else 0.0,
+        },
+        "ops": ops_report,
+        "rss": {"before": rss_before, "peak": peak_rss()},
+        "feeds": dict(feed_stats, sheet_requests=sheet_requests),
+    }
+    if not quiet:
+        print(format_report(report))
+    return report
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{'operation':10s} {'count':>7s} {'errors':>6s} {'ops/s':>8s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'max ms':>9s}"]
+    for op, r in report["ops"].items():
+        lines.append(
+            f"{op:10s} {r['count']:7d} {r['errors']:6d} {r['per_second']:8.1f} "
+            + " ".join(f"{r[k] * 1000:9.2f}" for k in ("p50", "p95", "p99", "max"))
+        )
+    meta, tput = report["meta"], report["throughput"]
+    lines.append(
+        f"{meta['sessions']} sessions, {report['wall']:.2f} s: {tput['ops_per_second']:.1f} ops/s, "
+        f"{tput['rounds_per_second']:.2f} rounds/s"
+    )
+    rss = report["rss"]
+    if rss["peak"] is not None:
+        lines.append(f"peak RSS {rss['peak'] / 2**20:.1f} MiB (before load {rss['before'] / 2**20:.1f} MiB)")
+    return "\n".join(lines)
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    Return a line per operation whose p95 regressed by more than ``threshold``.
+    """
+    regressions = []
+    for op, res in current["ops"].items():
+        base = baseline.get("ops", {}).get(op)
+        if not base:
+            continue
+        ratio = res["p95"] / base["p95"] if base["p95"] else 1.0
+        if ratio > 1.0 + threshold:
+            regressions.append(f"{op}: p95 {base['p95'] * 1000:.2f} ms -> {res['p95'] * 1000:.2f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the builder with concurrent simulated sessions.")
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent sessions (default 8)")
+    parser.add_argument("--iterations", type=int, default=3, help="rounds per session (default 3)")
+    parser.add_argument("--duration", type=float, help="run for this many seconds instead of --iterations")
+    parser.add_argument("--rows", type=int, default=1000, help="products per synthetic sheet")
+    parser.add_argument("--sheets", type=int, default=4, help="distinct sheets, shared round-robin by sessions")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the sheet server delays every response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of sheet requests answered with 503")
+    parser.add_argument("--think", type=float, default=0.0, help="mean seconds a session pauses between operations")
+    parser.add_argument("--feed-ttl", type=float, default=300.0, help="feed cache TTL in seconds")
+    parser.add_argument("--ops", default=",".join(OPS), help=f"comma-separated subset of {','.join(OPS)}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="write the report as JSON to this path")
+    parser.add_argument("--compare", help="baseline report to compare p95 latencies against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p95 slowdown fraction (default 0.25)")
+    args = parser.parse_args(argv)
+
+    current = run(
+        sessions=args.sessions,
+        iterations=args.iterations,
+        duration=args.duration,
+        rows=args.rows,
+        sheets=args.sheets,
+        latency=args.latency,
+        fail_rate=args.fail_rate,
+        think=args.think,
+        feed_ttl=args.feed_ttl,
+        ops=[op.strip() for op in args.ops.split(",") if op.strip()],
+        seed=args.seed,
+    )
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(current, fh, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            regressions = compare(current, json.load(fh), args.threshold)
+        if regressions:
+            print("Regressions beyond threshold:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print("No regressions beyond threshold.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
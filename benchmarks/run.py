@@ -0,0 +1,200 @@
+"""
+Benchmarks for the sanitize, render, CSV and ZIP hot paths, using synthetic inputs served
+from a local stand-in sheet server (fully offline).
+
+    python -m benchmarks.run                              # print results
+    python -m benchmarks.run --save benchmarks/baseline.json
+    python -m benchmarks.run --compare benchmarks/baseline.json --threshold 0.25
+
+``--compare`` exits non-zero if any case's median is more than ``threshold`` (a fraction)
+slower than the baseline. ``--quick`` drops the largest inputs; ``-k`` filters case names.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from generator.context import ContextCache
+from generator.feeds import FeedCache
+from generator.incremental import RenderCache
+from generator.sanitizer import clean_html, clear_clean_cache
+from generator.site_builder import SiteBuilder
+
+from .sheet_server import SheetServer, synthetic_csv
+
+
+def legal_body(paragraphs: int) -> str:
+    para = (
+        "<p>We collect <strong>personal data</strong> such as your name &amp; email when you "
+        "<a href='https://example.com/contact' onclick='x()'>contact us</a>. "
+        "<script>track()</script>Data is retained for 24 months.</p>\n"
+    )
+    return "<h2>Privacy Policy</h2>\n" + para * paragraphs
+
+
+def base_context(**extra) -> dict:
+    ctx = {
+        "biz_name": "Red Hippo (The Planners)",
+        "biz_phone": "+91 84540 02711",
+        "biz_email": "events@example.com",
+        "biz_cat": "Luxury Wedding Planner",
+        "biz_addr": "12 <b>Main</b> Road, New Delhi",
+        "prod_url": "https://example.com/site/",
+        "hero_h": "Crafting Dream Weddings",
+        "seo_d": "Verified 2026 AI-Ready Industrial Assets.",
+        "biz_serv": [f"Service {i} & more" for i in range(12)],
+        "about_txt": "<p>About us</p>" * 20,
+        "priv_body": legal_body(40),
+        "terms_body": legal_body(40),
+        "p_color": "#0f172a",
+        "s_color": "#06b6d4",
+        "border_rad": "24px",
+        "layout_dna": "Industrial Titan",
+        "map_iframe": "",
+        "sheet_url": "",
+    }
+    ctx.update(extra)
+    return ctx
+
+
+class Bench:
+    def __init__(self, workdir: str, server: SheetServer):
+        self.workdir = workdir
+        self.server = server
+        self.feed_cache = FeedCache(cache_dir=os.path.join(workdir, "feeds"), ttl=3600)
+
+    def builder(self, feed_cache: Optional[FeedCache] = None) -> SiteBuilder:
+        # fresh memo caches so every run measures the real work
+        clear_clean_cache()
+        return SiteBuilder(
+            context_cache=ContextCache(), render_cache=RenderCache(), feed_cache=feed_cache or self.feed_cache
+        )
+
+    def cold_feed_cache(self) -> FeedCache:
+        path = tempfile.mkdtemp(dir=self.workdir)
+        return FeedCache(cache_dir=path, ttl=3600)
+
+    def feed(self, name: str, rows: int, delimiter: str = ",") -> str:
+        path = f"/{name}"
+        if path not in self.server.feeds:
+            self.server.feeds[path] = synthetic_csv(rows, delimiter=delimiter)
+        return self.server.url(path)
+
+
+def cases(bench: Bench, quick: bool) -> Dict[str, Callable[[], None]]:
+    sizes = [10, 1000] if quick else [10, 1000, 50000]
+    out: Dict[str, Callable[[], None]] = {}
+
+    ctx = base_context()
+    out["sanitize_context"] = lambda: bench.builder()._sanitize_context(ctx)
+
+    body = legal_body(400)
+    out["clean_html[legal-large]"] = lambda: (clear_clean_cache(), clean_html(body))
+
+    for n in sizes:
+        url = bench.feed(f"home-{n}.csv", n)
+        bench.feed_cache.get_meta(url)  # warm the feed: this case measures parse + render
+        out[f"render_home[{n}]"] = lambda url=url: bench.builder().render_home(base_context(sheet_url=url))
+
+    rows = 1000 if quick else 20000
+    for label, delim in (("csv", ","), ("pipe", "|")):
+        url = bench.feed(f"fetch-{label}.txt", rows, delim)
+        out[f"fetch_products[{label}-{rows}]"] = lambda url=url: bench.builder(
+            bench.cold_feed_cache()
+        )._fetch_products_from_sheet(url)
+
+    out["build_zip[no-products]"] = lambda: bench.builder().build_zip(base_context(), io.BytesIO())
+    zip_rows = 1000 if quick else 10000
+    url = bench.feed(f"zip-{zip_rows}.csv", zip_rows)
+    bench.feed_cache.get_meta(url)
+    out[f"build_zip[{zip_rows}]"] = lambda: bench.builder().build_zip(base_context(sheet_url=url), io.BytesIO())
+    return out
+
+
+def run(repeat: int = 5, quick: bool = False, pattern: str = "") -> dict:
+    workdir = tempfile.mkdtemp(prefix="titan-bench-")
+    results = {}
+    try:
+        with SheetServer() as server:
+            bench = Bench(workdir, server)
+            for name, fn in cases(bench, quick).items():
+                if pattern and pattern not in name:
+                    continue
+                fn()  # warm-up (template compile, imports, first feed download)
+                times: List[float] = []
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    fn()
+                    times.append(time.perf_counter() - t0)
+                results[name] = {
+                    "median": statistics.median(times),
+                    "min": min(times),
+                    "mean": statistics.fmean(times),
+                    "runs": repeat,
+                }
+                print(f"{name:32s} median {results[name]['median'] * 1000:9.2f} ms   min {results[name]['min'] * 1000:9.2f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    Return a line per case whose median regressed by more than ``threshold``.
+    """
+    regressions = []
+    for name, res in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        ratio = res["median"] / base["median"] if base["median"] else 1.0
+        if ratio > 1.0 + threshold:
+            regressions.append(f"{name}: {base['median'] * 1000:.2f} ms -> {res['median'] * 1000:.2f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run generator benchmarks.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="skip the largest inputs")
+    parser.add_argument("-k", dest="pattern", default="", help="only run cases containing this text")
+    parser.add_argument("--save", help="write results as a JSON baseline to this path")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown fraction (default 0.25)")
+    args = parser.parse_args(argv)
+
+    current = run(args.repeat, args.quick, args.pattern)
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(current, fh, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            regressions = compare(current, json.load(fh), args.threshold)
+        if regressions:
+            print("Regressions beyond threshold:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print("No regressions beyond threshold.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
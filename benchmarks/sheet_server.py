@@ -0,0 +1,153 @@
+"""
+Local stand-in for a published Google Sheet, for benchmarks, load tests and unit tests.
+
+Serves in-memory CSV/pipe-delimited feeds with ETag revalidation, optional per-request
+latency and a configurable failure rate, so fetch paths can be exercised fully offline.
+
+    python -m benchmarks.sheet_server --rows 10000 --port 8765
+    # -> http://127.0.0.1:8765/sheet.csv and /sheet.psv
+"""
+import argparse
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+WORDS = ["Rose", "Lily", "Orchid", "Velvet", "Royal", "Golden", "Classic", "Premium", "Crystal", "Floral"]
+
+
+def synthetic_csv(rows: int, delimiter: str = ",", header: bool = True, seed: int = 0) -> str:
+    """
+    Deterministic product sheet with ``rows`` products (name, price, desc, img).
+    """
+    rng = random.Random(seed)
+    lines = [delimiter.join(["name", "price", "desc", "img"])] if header else []
+    for i in range(rows):
+        name = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}"
+        price = f"₹{rng.randint(100, 99999):,}"
+        desc = " ".join(rng.choice(WORDS).lower() for _ in range(12))
+        img = f"https://example.com/img/{i}.jpg"
+        if delimiter == ",":
+            price = f'"{price}"'
+        lines.append(delimiter.join([name, price, desc, img]))
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        srv = self.server
+        with srv.lock:
+            srv.requests += 1
+        if srv.latency:
+            time.sleep(srv.latency)
+        if srv.fail_rate and srv.rng.random() < srv.fail_rate:
+            self.send_error(503)
+            return
+        body = srv.feeds.get(self.path.split("?", 1)[0])
+        if body is None:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        etag = '"%s"' % hashlib.sha1(data).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class SheetServer:
+    """
+    Threaded HTTP server on a background thread. Set ``feeds[path] = text`` to publish a feed.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        fail_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.feeds: Dict[str, str] = {}
+        self.httpd.requests = 0
+        self.httpd.lock = threading.Lock()
+        self.httpd.latency = latency
+        self.httpd.fail_rate = fail_rate
+        self.httpd.rng = random.Random(seed)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def feeds(self) -> Dict[str, str]:
+        return self.httpd.feeds
+
+    @property
+    def requests(self) -> int:
+        return self.httpd.requests
+
+    @property
+    def latency(self) -> float:
+        return self.httpd.latency
+
+    @latency.setter
+    def latency(self, seconds: float):
+        self.httpd.latency = seconds
+
+    def url(self, path: str) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def start(self) -> "SheetServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "SheetServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve synthetic product sheets locally.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to delay every response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args(argv)
+
+    server = SheetServer(port=args.port, latency=args.latency, fail_rate=args.fail_rate)
+    server.feeds["/sheet.csv"] = synthetic_csv(args.rows)
+    server.feeds["/sheet.psv"] = synthetic_csv(args.rows, delimiter="|")
+    print(f"Serving {args.rows} rows at {server.url('/sheet.csv')} and {server.url('/sheet.psv')}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
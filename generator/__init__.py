@@ -0,0 +1,40 @@
+"""
+Titan static-site generator: sanitized contexts rendered through Jinja templates into
+HTML pages, streamed ZIP exports, delta deploys, batch builds and an HTTP render service.
+
+Importing the package is cheap. The names below are loaded on first access, and heavy
+dependencies load only when a feature needs them (requests on the first sheet fetch,
+bleach when markup needs cleaning, Pillow when images are optimized):
+
+    from generator import SiteBuilder
+    html = SiteBuilder().render_page("index.html", context)
+"""
+import importlib
+
+# public name -> module that defines it
+_EXPORTS = {
+    "SiteBuilder": ".site_builder",
+    "build_batch": ".batch",
+    "RenderService": ".service",
+    "FeedCache": ".feeds",
+    "ProductTable": ".products",
+    "MetricsCollector": ".metrics",
+    "observing": ".metrics",
+    "deploy_files": ".deploy",
+    "ArtifactStore": ".artifacts",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
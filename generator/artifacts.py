@@ -0,0 +1,183 @@
+"""
+Shared, disk-backed store for exported site ZIPs, addressed by export fingerprint.
+
+The key is SiteBuilder.export_fingerprint(), a hash of every input any exported file reads
+and of the export format version, so sessions exporting the same site share one file, it
+survives restarts, and a generator upgrade that changes the output does not serve ZIPs
+written by the old one. Callers keep only the key; the store itself holds no ZIP in memory.
+How a download is served decides that: ``iter_chunks`` (used by the render service's /zip)
+streams it with flat memory, while Streamlit's download button reads the whole ZIP into its
+in-memory media storage when clicked, so that copy lives as long as Streamlit keeps it.
+
+    <root>/<key>.zip          one artifact (written to a temp file, then renamed into place)
+
+Concurrent requests for one key within a process build it once. Reads refresh an artifact's
+mtime, and after each new artifact the store drops entries not used for ``max_age`` seconds,
+then the least recently used until the total fits in ``max_bytes``.
+
+Configuration (environment, read when the default store is first created):
+    TITAN_ARTIFACT_DIR        store directory (default ~/.cache/titan/artifacts)
+    TITAN_ARTIFACT_MAX_BYTES  maximum total size (default 2 GiB)
+    TITAN_ARTIFACT_MAX_AGE    seconds an unused artifact is kept (default 7 days)
+"""
+import os
+import re
+import threading
+import time
+from typing import BinaryIO, Callable, Iterator, Optional, Tuple
+
+from .export import CHUNK_SIZE
+from .storage import atomic_file, default_cache_dir
+
+SUFFIX = ".zip"
+# parts left behind by a crashed writer are removed after this long
+_STALE_PART = 3600.0
+_KEY = re.compile(r"^[0-9a-f]{16,128}$")
+
+
+def _check_key(key: str):
+    if not isinstance(key, str) or not _KEY.match(key):
+        raise ValueError(f"artifact keys are lowercase hex digests, got {key!r}")
+
+
+class ArtifactStore:
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        max_bytes: int = 2 * 1024 ** 3,
+        max_age: float = 7 * 24 * 3600.0,
+    ):
+        self.root = root or default_cache_dir("TITAN_ARTIFACT_DIR", "artifacts")
+        os.makedirs(self.root, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # striped per-key build locks: one build per key, unrelated keys rarely wait
+        self._build_locks = [threading.Lock() for _ in range(32)]
+        self.counters = {"hits": 0, "misses": 0, "evicted": 0}
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    def path(self, key: str) -> str:
+        _check_key(key)
+        return os.path.join(self.root, key + SUFFIX)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Path of the artifact for ``key``, or None when it is not (or no longer) stored.
+        """
+        path = self.path(key)
+        try:
+            os.utime(path)  # recently used: evicted last
+        except OSError:
+            return None
+        return path
+
+    def get_or_create(self, key: str, write: Callable[[BinaryIO], object]) -> Tuple[str, bool]:
+        """
+        Return ``(path, hit)`` for ``key``, calling ``write(fh)`` with a binary file to build
+        the artifact on a miss.
+        """
+        path = self.path(key)
+        with self._build_locks[int(key[:8], 16) % len(self._build_locks)]:
+            if self.get(key) is not None:
+                self._count("hits")
+                return path, True
+            self._count("misses")
+            with atomic_file(path, prefix=".part-") as fh:
+                write(fh)
+        self.prune(keep=key)
+        return path, False
+
+    def open(self, key: str) -> BinaryIO:
+        """
+        Open the artifact for reading (FileNotFoundError when it is not stored).
+        """
+        path = self.path(key)
+        fh = open(path, "rb")
+        os.utime(path)
+        return fh
+
+    def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Stream the artifact in ``chunk_size`` pieces (e.g. an HTTP response body).
+        """
+        with self.open(key) as fh:
+            while True:
+                chunk = fh.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def prune(self, keep: Optional[str] = None) -> int:
+        """
+        Apply the age and size limits; return how many artifacts were removed. ``keep``
+        (a key) is never removed. An artifact being downloaded can be removed safely: open
+        readers keep their data on POSIX.
+        """
+        now = time.time()
+        entries, total, removed = [], 0, 0
+        for entry in os.scandir(self.root):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            if entry.name.startswith(".part-"):
+                if now - st.st_mtime > _STALE_PART:
+                    self._remove(entry.path)
+                continue
+            if not entry.name.endswith(SUFFIX):
+                continue
+            if keep is not None and entry.name == keep + SUFFIX:
+                total += st.st_size
+                continue
+            if now - st.st_mtime > self.max_age:
+                removed += self._remove(entry.path)
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+        entries.sort()
+        while entries and total > self.max_bytes:
+            _, size, path = entries.pop(0)
+            total -= size
+            removed += self._remove(path)
+        if removed:
+            self._count("evicted", removed)
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+        except OSError:
+            return False
+        return True
+
+    def stats(self) -> dict:
+        entries = total = 0
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(SUFFIX):
+                try:
+                    total += entry.stat().st_size
+                except OSError:
+                    continue
+                entries += 1
+        with self._lock:
+            return dict(self.counters, entries=entries, bytes=total)
+
+
+_default_store: Optional[ArtifactStore] = None
+_default_lock = threading.Lock()
+
+
+def default_artifact_store() -> ArtifactStore:
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = ArtifactStore(
+                max_bytes=int(os.environ.get("TITAN_ARTIFACT_MAX_BYTES", 2 * 1024 ** 3)),
+                max_age=float(os.environ.get("TITAN_ARTIFACT_MAX_AGE", 7 * 24 * 3600)),
+            )
+        return _default_store
@@ -0,0 +1,261 @@
+"""
+Image optimization for exports (Pillow): responsive WebP/JPEG variants bundled into the ZIP.
+
+Source images come from a local directory (matched by file name) or are downloaded once
+into an on-disk source cache. Variants are generated at several widths in a process pool,
+named by the source content hash (so identical images are processed and shipped once),
+and cached on disk with a small manifest, so rebuilding an unchanged site does no image work.
+
+Templates receive ``images``: source URL -> {"src", "width", "height", "webp", "jpeg"},
+where ``webp``/``jpeg`` are lists of {"file", "w"} used to build ``srcset``.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .storage import atomic_file, atomic_write, default_cache_dir
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+    import requests
+
+WIDTHS = (480, 960, 1600)
+ASSET_DIR = "assets/img"
+
+
+def _make_variants(src_path: str, out_dir: str, key: str, widths: Tuple[int, ...], quality: int) -> dict:
+    """
+    Generate WebP and JPEG variants of ``src_path`` (runs in a worker process).
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(src_path) as im:
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ("RGB", "L"):
+            background = Image.new("RGB", im.size, (255, 255, 255))
+            background.paste(im.convert("RGBA"), mask=im.convert("RGBA").split()[-1])
+            im = background
+        elif im.mode == "L":
+            im = im.convert("RGB")
+        orig_w, orig_h = im.size
+        targets = sorted({w for w in widths if w < orig_w} | {min(orig_w, max(widths))})
+        manifest = {"width": 0, "height": 0, "webp": [], "jpeg": []}
+        for w in targets:
+            h = max(1, round(orig_h * w / orig_w))
+            resized = im if w == orig_w else im.resize((w, h), Image.LANCZOS)
+            for fmt, ext, opts in (
+                ("webp", "webp", {"quality": quality, "method": 4}),
+                ("jpeg", "jpg", {"quality": quality, "optimize": True, "progressive": True}),
+            ):
+                name = f"{key}-{w}.{ext}"
+                with atomic_file(os.path.join(out_dir, name)) as fh:
+                    resized.save(fh, format=fmt.upper(), **opts)
+                manifest[fmt].append({"file": f"{ASSET_DIR}/{name}", "w": w})
+            manifest["width"], manifest["height"] = w, h
+    manifest["src"] = manifest["jpeg"][-1]["file"]
+    atomic_write(os.path.join(out_dir, f"{key}.json"), json.dumps(manifest).encode("utf-8"))
+    return manifest
+
+
+class ImagePipeline:
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        source_dir: Optional[str] = None,
+        widths: Tuple[int, ...] = WIDTHS,
+        quality: int = 80,
+        workers: Optional[int] = None,
+        timeout: float = 10.0,
+    ):
+        self.cache_dir = cache_dir or default_cache_dir("TITAN_IMAGE_CACHE_DIR", "images")
+        self.source_dir = source_dir
+        self.widths = tuple(sorted(widths))
+        self.quality = quality
+        self.workers = workers
+        self.timeout = timeout
+        self.sources_dir = os.path.join(self.cache_dir, "sources")
+        self.variants_dir = os.path.join(self.cache_dir, "variants")
+        os.makedirs(self.sources_dir, exist_ok=True)
+        os.makedirs(self.variants_dir, exist_ok=True)
+        self._session: Optional["requests.Session"] = None
+        self._lock = threading.Lock()
+        self._pool: Optional["ProcessPoolExecutor"] = None
+        self._pool_pid: Optional[int] = None
+        self.counters = {"processed": 0, "cached": 0, "failed": 0}
+
+    # --- sources ---
+    def _local_source(self, url: str) -> Optional[str]:
+        if not self.source_dir:
+            return None
+        # contexts can come from remote callers (the render service): only files inside
+        # source_dir are read, whatever absolute paths, ".." or symlinks a URL contains
+        root = os.path.realpath(self.source_dir)
+        parsed = urlparse(url)
+        for candidate in (url if not parsed.scheme else None, os.path.basename(parsed.path)):
+            if candidate:
+                path = os.path.realpath(os.path.join(root, candidate))
+                if path.startswith(root + os.sep) and os.path.isfile(path):
+                    return path
+        return None
+
+    def _source(self, url: str) -> Optional[Tuple[str, str]]:
+        """
+        Return ``(path, content_hash)`` for ``url``, downloading it once if needed.
+        """
+        local = self._local_source(url)
+        if local:
+            with open(local, "rb") as fh:
+                return local, hashlib.sha256(fh.read()).hexdigest()[:16]
+
+        url_key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        body, index = os.path.join(self.sources_dir, url_key), os.path.join(self.sources_dir, url_key + ".json")
+        try:
+            with open(index, encoding="utf-8") as fh:
+                return body, json.load(fh)["hash"]
+        except (OSError, ValueError, KeyError):
+            pass
+        if urlparse(url).scheme not in ("http", "https"):
+            return None
+        if self._session is None:
+            import requests  # only needed once an image is actually downloaded
+
+            self._session = requests.Session()
+        resp = self._session.get(url, timeout=self.timeout)
+        resp.raise_for_status()
+        atomic_write(body, resp.content)
+        content_hash = hashlib.sha256(resp.content).hexdigest()[:16]
+        atomic_write(index, json.dumps({"url": url, "hash": content_hash}).encode("utf-8"))
+        return body, content_hash
+
+    # --- variants ---
+    def _variant_key(self, content_hash: str) -> str:
+        settings = f"{content_hash}:{','.join(map(str, self.widths))}:{self.quality}"
+        return hashlib.sha256(settings.encode("utf-8")).hexdigest()[:16]
+
+    def _cached(self, key: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.variants_dir, f"{key}.json"), encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def process(self, urls: Iterable[str]) -> Dict[str, dict]:
+        """
+        Map each usable source URL to its responsive variants; failures are left out so the
+        template keeps the original URL.
+        """
+        by_key: Dict[str, list] = {}
+        sources: Dict[str, str] = {}
+        for url in dict.fromkeys(u for u in urls if u):
+            try:
+                found = self._source(url)
+            except Exception:
+                found = None
+            if found is None:
+                self.counters["failed"] += 1
+                continue
+            key = self._variant_key(found[1])
+            by_key.setdefault(key, []).append(url)
+            sources[key] = found[0]
+
+        manifests, todo = {}, []
+        for key in by_key:
+            cached = self._cached(key)
+            if cached is not None:
+                manifests[key] = cached
+                self.counters["cached"] += 1
+            else:
+                todo.append(key)
+
+        if len(todo) > 1 and self.workers != 1:
+            results = self._make_in_pool(todo, sources)
+        else:
+            results = [self._make(sources[key], key) for key in todo]
+        for key, manifest in zip(todo, results):
+            if manifest is None:
+                self.counters["failed"] += 1
+                continue
+            manifests[key] = manifest
+            self.counters["processed"] += 1
+
+        return {url: manifests[key] for key, urls_ in by_key.items() if key in manifests for url in urls_}
+
+    def _make(self, src_path: str, key: str) -> Optional[dict]:
+        try:
+            return _make_variants(src_path, self.variants_dir, key, self.widths, self.quality)
+        except Exception:
+            return None
+
+    def _process_pool(self) -> "ProcessPoolExecutor":
+        # one pool per pipeline, reused by every inventory page of every export; worker
+        # processes do not survive a fork (batch and service workers): one pool per process
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                from concurrent.futures import ProcessPoolExecutor
+
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _make_in_pool(self, todo: List[str], sources: Dict[str, str]) -> List[Optional[dict]]:
+        from concurrent.futures.process import BrokenProcessPool
+
+        pool = self._process_pool()
+        try:
+            futures = [
+                pool.submit(_make_variants, sources[k], self.variants_dir, k, self.widths, self.quality) for k in todo
+            ]
+        except (BrokenProcessPool, RuntimeError):  # a worker died or the pool was shut down
+            self._discard_pool(pool)
+            return [self._make(sources[key], key) for key in todo]
+        results = []
+        for fut in futures:
+            try:
+                results.append(fut.result())
+            except BrokenProcessPool:
+                self._discard_pool(pool)
+                results.append(None)
+            except Exception:
+                results.append(None)
+        return results
+
+    def _discard_pool(self, pool: "ProcessPoolExecutor"):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            own = self._pool_pid == os.getpid()
+        if pool is not None and own:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def files(self, images: Dict[str, dict]) -> Iterable[Tuple[str, str]]:
+        """
+        Yield ``(zip_name, disk_path)`` for every variant referenced by ``images`` (deduplicated).
+        """
+        seen = set()
+        for manifest in images.values():
+            for variant in manifest["webp"] + manifest["jpeg"]:
+                name = variant["file"]
+                if name not in seen:
+                    seen.add(name)
+                    yield name, os.path.join(self.variants_dir, os.path.basename(name))
+
+
+_default_pipeline: Optional[ImagePipeline] = None
+_default_lock = threading.Lock()
+
+
+def default_image_pipeline() -> ImagePipeline:
+    global _default_pipeline
+    with _default_lock:
+        if _default_pipeline is None:
+            _default_pipeline = ImagePipeline(source_dir=os.environ.get("TITAN_IMAGE_SOURCE_DIR"))
+        return _default_pipeline
@@ -0,0 +1,245 @@
+"""
+Headless batch mode: build many sites from a JSONL/CSV manifest across a process pool.
+
+    python -m generator.batch clients.jsonl --out dist/ --workers 8 --report report.json
+
+Each manifest row is a SiteBuilder context (the same dict app.py builds). Jobs that share
+a ``sheet_url`` are dispatched together so each worker fetches a feed once, and every
+worker compiles the templates once at startup. ZIPs are written straight to disk; with
+``--format dir`` each site is instead delta-deployed to a directory (see generator.deploy).
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from typing import Iterable, List, Optional, Tuple, Union
+
+from .sanitizer import sanitize_filename
+from .site_builder import SiteBuilder
+
+# list-valued context fields and the separator used when a manifest gives them as text
+LIST_FIELDS = {"biz_serv": "\n", "area_list": ","}
+
+
+@dataclass
+class SiteResult:
+    name: str
+    path: str
+    ok: bool
+    seconds: float
+    bytes: int = 0
+    error: str = ""
+    # --format dir: files added, changed or removed by this deploy
+    files_changed: int = 0
+    # shared nav/footer/hero fragments rendered vs. reused for this site
+    fragment_hits: int = 0
+    fragment_misses: int = 0
+
+
+@dataclass
+class BatchReport:
+    results: List[SiteResult] = field(default_factory=list)
+    elapsed: float = 0.0
+    workers: int = 1
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for r in self.results if r.ok)
+
+    @property
+    def failed(self) -> int:
+        return len(self.results) - self.succeeded
+
+    @property
+    def fragment_hit_rate(self) -> float:
+        hits = sum(r.fragment_hits for r in self.results)
+        total = hits + sum(r.fragment_misses for r in self.results)
+        return hits / total if total else 0.0
+
+    @property
+    def sites_per_sec(self) -> float:
+        return len(self.results) / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "sites": len(self.results),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "elapsed": round(self.elapsed, 3),
+            "workers": self.workers,
+            "sites_per_sec": round(self.sites_per_sec, 2),
+            "fragment_hit_rate": round(self.fragment_hit_rate, 3),
+            "results": [asdict(r) for r in self.results],
+        }
+
+
+# --- manifest loading ---
+def _normalize(row: dict) -> dict:
+    ctx = {k: v for k, v in row.items() if k is not None}
+    for key, sep in LIST_FIELDS.items():
+        value = ctx.get(key)
+        if isinstance(value, str):
+            ctx[key] = [s.strip() for s in value.split(sep) if s.strip()]
+    return ctx
+
+
+def load_manifest(path: str) -> List[dict]:
+    """
+    Read a manifest of contexts. ``.csv`` files use the header row as context keys;
+    anything else is treated as JSON Lines (one context object per line).
+    """
+    with open(path, newline="", encoding="utf-8") as fh:
+        if path.lower().endswith(".csv"):
+            rows = [dict(r) for r in csv.DictReader(fh)]
+        else:
+            rows = [json.loads(line) for line in fh if line.strip()]
+    return [_normalize(r) for r in rows]
+
+
+def _output_name(ctx: dict, taken: set, ext: str = ".zip") -> str:
+    name = ctx.get("output") or f"{(ctx.get('biz_name') or 'site').lower().replace(' ', '_')}_final{ext}"
+    name = sanitize_filename(name)
+    stem, ext = os.path.splitext(name)
+    candidate, n = name, 1
+    while candidate in taken:
+        n += 1
+        candidate = f"{stem}-{n}{ext}"
+    taken.add(candidate)
+    return candidate
+
+
+def _plan(contexts: List[dict], out_dir: str, chunk_size: int, fmt: str = "zip") -> List[List[Tuple[str, str, dict]]]:
+    """
+    Group jobs by sheet_url (so a worker fetches each feed once) and split groups into
+    chunks of at most ``chunk_size`` so one popular feed cannot serialize the batch.
+    """
+    taken: set = set()
+    groups: dict = {}
+    for ctx in contexts:
+        ctx = _normalize(ctx)
+        fname = _output_name(ctx, taken, ".zip" if fmt == "zip" else "")
+        job = (ctx.get("biz_name") or fname, os.path.join(out_dir, fname), ctx)
+        groups.setdefault((ctx.get("sheet_url") or "").strip(), []).append(job)
+
+    chunks = []
+    for jobs in groups.values():
+        for i in range(0, len(jobs), chunk_size):
+            chunks.append(jobs[i : i + chunk_size])
+    return chunks
+
+
+# --- worker side ---
+_worker_builder: Optional[SiteBuilder] = None
+
+
+def _init_worker():
+    global _worker_builder
+    # SiteBuilder warms the template registry (compiled once per process, bytecode on disk)
+    # (the batch already runs one process per core, so entries are compressed inline)
+    _worker_builder = SiteBuilder(zip_workers=1)
+
+
+def _build_chunk(jobs: List[Tuple[str, str, dict]], fmt: str = "zip") -> List[SiteResult]:
+    if _worker_builder is None:
+        _init_worker()
+    results = []
+    fragments = _worker_builder.templates.fragments
+    for name, path, ctx in jobs:
+        t0 = time.perf_counter()
+        hits, misses = fragments.hits, fragments.misses
+        try:
+            if fmt == "dir":
+                deployed = _worker_builder.deploy_dir(ctx, path)
+                res = SiteResult(name, path, True, time.perf_counter() - t0, deployed.bytes_written)
+                res.files_changed = len(deployed.added) + len(deployed.changed) + len(deployed.removed)
+            else:
+                _worker_builder.build_zip(ctx, path)  # written beside <path>, then renamed
+                res = SiteResult(name, path, True, time.perf_counter() - t0, os.path.getsize(path))
+        except Exception as e:
+            res = SiteResult(name, path, False, time.perf_counter() - t0, error=f"{type(e).__name__}: {e}")
+        res.fragment_hits, res.fragment_misses = fragments.hits - hits, fragments.misses - misses
+        results.append(res)
+    return results
+
+
+# --- public API ---
+def build_batch(
+    manifest: Union[str, Iterable[dict]],
+    out_dir: str,
+    workers: Optional[int] = None,
+    chunk_size: int = 8,
+    on_result=None,
+    fmt: str = "zip",
+) -> BatchReport:
+    """
+    Build every context in ``manifest`` (a path or an iterable of dicts) into ``out_dir``,
+    as ZIPs (``fmt="zip"``) or delta-deployed directories (``fmt="dir"``).
+    ``workers=1`` builds in-process; otherwise a process pool of ``workers`` (default: all
+    cores) is used. ``on_result`` is called with each SiteResult as it completes.
+    """
+    if fmt not in ("zip", "dir"):
+        raise ValueError(f"unknown output format: {fmt!r}")
+    contexts = load_manifest(manifest) if isinstance(manifest, str) else list(manifest)
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    chunks = _plan(contexts, out_dir, max(1, chunk_size), fmt)
+
+    report = BatchReport(workers=workers)
+    t0 = time.perf_counter()
+    if workers == 1:
+        for chunk in chunks:
+            for res in _build_chunk(chunk, fmt):
+                report.results.append(res)
+                if on_result:
+                    on_result(res)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_build_chunk, chunk, fmt) for chunk in chunks]
+            for fut in as_completed(futures):
+                for res in fut.result():
+                    report.results.append(res)
+                    if on_result:
+                        on_result(res)
+    report.elapsed = time.perf_counter() - t0
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build many sites from a JSONL/CSV manifest.")
+    parser.add_argument("manifest", help="path to a .jsonl or .csv manifest of site contexts")
+    parser.add_argument("--out", default="dist", help="directory to write sites into")
+    parser.add_argument(
+        "--format", choices=("zip", "dir"), default="zip", help="ZIP per site, or a delta-deployed directory per site"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="process count (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=8, help="max sites per worker task")
+    parser.add_argument("--report", help="write a JSON report to this path")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args(argv)
+
+    def _print(res: SiteResult):
+        if not args.quiet:
+            status = "ok  " if res.ok else "FAIL"
+            detail = f"{res.bytes} bytes" if res.ok else res.error
+            if res.ok and args.format == "dir":
+                detail = f"{res.files_changed} files changed, {detail} written"
+            print(f"[{status}] {res.name} -> {res.path} ({res.seconds:.2f}s, {detail})")
+
+    report = build_batch(args.manifest, args.out, args.workers, args.chunk_size, on_result=_print, fmt=args.format)
+    print(
+        f"{report.succeeded}/{len(report.results)} sites built in {report.elapsed:.2f}s "
+        f"({report.sites_per_sec:.1f} sites/s, {report.workers} workers, "
+        f"{report.fragment_hit_rate:.0%} fragment reuse)"
+    )
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as fh:
+            json.dump(report.to_dict(), fh, indent=2)
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
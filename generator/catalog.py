@@ -0,0 +1,107 @@
+"""
+Client-side product catalog for exports: the full inventory as compact JSON shards plus a
+prebuilt search index, so the home page ships only its first cards and the browser loads
+the rest on scroll or search.
+
+    products/catalog.json    {"fields", "count", "shard_size", "shards", "terms", "by_price"}
+    products/data-<n>.json   [[name, price, desc, img(, url)], ...]  (product ids (n-1)*shard_size ...)
+    products/items/<n>-<slug>.html   optional static detail page per product (see product_path)
+
+The home page embeds ``count``, ``shard_size`` and ``shards`` in data-* attributes, so
+scrolling fetches only shards and its first view stays the same size for any inventory;
+catalog.json, which grows with the inventory, is fetched on the first search or sort.
+
+``terms`` maps each lowercased word of a product's name/description to the ids containing
+it; ``by_price`` lists ids from cheapest to dearest (unpriced last). Shards are emitted as
+the feed streams past, so only one shard is held in memory; building is one pass plus a
+single sort for the price order.
+"""
+import json
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .products import price_value, product_amount  # price_value stays importable from here
+
+CATALOG_INDEX = "products/catalog.json"
+FIELDS = ("name", "price", "desc", "img", "url")
+
+_WORD = re.compile(r"\w+")
+_SLUG = re.compile(r"[^a-z0-9]+")
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def search_terms(text: str) -> set:
+    return {w for w in _WORD.findall(text.lower()) if len(w) > 1 or w.isdigit()}
+
+
+def shard_name(number: int) -> str:
+    return f"products/data-{number}.json"
+
+
+def product_path(number: int, name: str) -> str:
+    """
+    Detail page of the ``number``-th product (1-based); the number keeps slugs unique.
+    """
+    slug = _SLUG.sub("-", (name or "").lower()).strip("-")[:60].rstrip("-")
+    return f"products/items/{number}-{slug or 'item'}.html"
+
+
+class CatalogBuilder:
+    def __init__(self, shard_size: int):
+        self.shard_size = max(1, shard_size)
+        self.count = 0
+        self.terms: Dict[str, List[int]] = {}
+        self._prices: List[Tuple[float, int]] = []
+        self._unpriced: List[int] = []
+        self._shard: List[list] = []
+        self._shards = 0
+
+    def add(self, products: Iterable[dict], images: Optional[dict] = None) -> Iterator[Tuple[str, str]]:
+        """
+        Index ``products`` and yield ``(filename, json)`` for every shard they complete.
+        Product images that were optimized (``images``: URL -> manifest) point at the bundled file.
+        """
+        for p in products:
+            pid = self.count
+            self.count += 1
+            for term in search_terms(f"{p.get('name', '')} {p.get('desc', '')}"):
+                self.terms.setdefault(term, []).append(pid)
+            value = product_amount(p)
+            if value is None:
+                self._unpriced.append(pid)
+            else:
+                self._prices.append((value, pid))
+            im = images.get(p.get("img")) if images else None
+            row = [p.get(f, "") for f in FIELDS]
+            if im:
+                row[FIELDS.index("img")] = im["src"]
+            if not row[-1]:
+                row.pop()  # no detail page
+            self._shard.append(row)
+            if len(self._shard) == self.shard_size:
+                yield self._flush()
+
+    def _flush(self) -> Tuple[str, str]:
+        self._shards += 1
+        rows, self._shard = self._shard, []
+        return shard_name(self._shards), _dumps(rows)
+
+    def finish(self) -> Iterator[Tuple[str, str]]:
+        """
+        Yield the last partial shard (if any) and the catalog index.
+        """
+        if self._shard:
+            yield self._flush()
+        self._prices.sort()
+        index = {
+            "fields": FIELDS,
+            "count": self.count,
+            "shard_size": self.shard_size,
+            "shards": self._shards,
+            "terms": self.terms,
+            "by_price": [pid for _, pid in self._prices] + self._unpriced,
+        }
+        yield CATALOG_INDEX, _dumps(index)
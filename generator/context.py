@@ -0,0 +1,115 @@
+"""
+Immutable sanitized contexts and the bounded cache that shares them across render paths.
+
+A SanitizedContext is keyed by a content hash of the raw input context, so rendering the
+home, about and contact pages and exporting the ZIP for the same input sanitizes (and
+fetches the product sheet) once.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Callable, Optional
+
+from .products import Product
+
+
+def context_hash(context: Mapping) -> str:
+    raw = json.dumps(dict(context), sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _freeze(value):
+    if isinstance(value, Product):
+        return value  # already read-only
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class SanitizedContext(Mapping):
+    """
+    Read-only mapping of sanitized template variables. ``digest`` is the content hash
+    of the raw context it was built from.
+    """
+
+    __slots__ = ("_data", "digest")
+
+    def __init__(self, data: Mapping, digest: str):
+        self._data = {k: _freeze(v) for k, v in data.items()}
+        self.digest = digest
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"SanitizedContext(digest={self.digest[:12]!r}, keys={len(self._data)})"
+
+
+class ContextCache:
+    """
+    Thread-safe LRU of SanitizedContext objects keyed by input content hash. Entries
+    older than ``max_age`` seconds are rebuilt so product sheets are eventually re-read.
+    """
+
+    def __init__(self, maxsize: int = 128, max_age: float = 300.0):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(
+        self,
+        context: Mapping,
+        build: Callable[[Mapping, str], SanitizedContext],
+        valid: Optional[Callable[[SanitizedContext], bool]] = None,
+    ) -> SanitizedContext:
+        """
+        Return the cached SanitizedContext for ``context``, building it on a miss, when it
+        is older than ``max_age`` or when ``valid(cached)`` is false.
+        """
+        key = context_hash(context)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.max_age and (valid is None or valid(entry[1])):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = build(context, key)
+        with self._lock:
+            self._entries[key] = (now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        return {"size": size, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+# process-wide cache shared by every SiteBuilder unless one is given explicitly
+default_context_cache = ContextCache()
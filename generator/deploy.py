@@ -0,0 +1,182 @@
+"""
+Delta deploys: write an export into a directory, touching only files whose content changed.
+
+    <path>                      symlink to the live release's site directory
+    <path>.releases/<n>/site/   one release: the exported files
+    <path>.releases/<n>/manifest.json
+        {"release", "files": {name: {"sha256", "size"}}, "added", "changed", "removed", ...}
+
+Each deploy hashes the files as they are produced and compares them with the live
+release's manifest. New and changed files are written to the next release; unchanged ones
+are hard-linked from the live release (no data copied), and files missing from the export
+are simply left out. The ``<path>`` symlink is then swapped in one atomic rename, so
+readers see either the old site or the new one. A deploy that changes nothing creates no
+release at all. The manifest's ``added``/``changed``/``removed`` lists are the delta a
+sync step needs to upload. Callers can store more state with the release through
+``extra`` (SiteBuilder.deploy_dir keeps the sitemap's lastmod history there).
+
+Releases share file data through hard links, so files in a release must not be edited in
+place. Only one deploy per ``<path>`` may run at a time.
+"""
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple, Union
+
+MANIFEST = "manifest.json"
+SITE_DIR = "site"
+
+Files = Iterable[Tuple[str, Union[str, bytes]]]
+
+
+@dataclass
+class DeployResult:
+    path: str
+    release: int = 0
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    bytes_written: int = 0
+
+    @property
+    def swapped(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+def _releases_dir(path: str) -> str:
+    return path + ".releases"
+
+
+def _release_dir(path: str, number: int) -> str:
+    return os.path.join(_releases_dir(path), f"{number:06d}")
+
+
+def _live_release(path: str) -> Optional[int]:
+    if not os.path.islink(path):
+        if os.path.lexists(path):
+            raise FileExistsError(f"{path} exists and is not a deploy directory (expected a symlink)")
+        return None
+    # <path>.releases/<n>/site
+    return int(os.path.basename(os.path.dirname(os.path.realpath(path))))
+
+
+def read_manifest(path: str) -> dict:
+    """
+    Manifest of the live release at ``path`` (empty when nothing has been deployed).
+    """
+    number = _live_release(os.path.abspath(path))
+    if number is None:
+        return {"release": 0, "files": {}}
+    with open(os.path.join(_release_dir(os.path.abspath(path), number), MANIFEST), encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _check_name(name: str):
+    parts = name.split("/")
+    if name.startswith("/") or ".." in parts or "" in parts:
+        raise ValueError(f"unsafe file name in export: {name!r}")
+
+
+class _Release:
+    def __init__(self, path: str, number: int, previous: Optional[str]):
+        self.root = _release_dir(path, number)
+        self.site = os.path.join(self.root, SITE_DIR)
+        self.previous = previous
+        self._dirs = set()
+        os.makedirs(self.site)
+
+    def _target(self, name: str) -> str:
+        target = os.path.join(self.site, *name.split("/"))
+        parent = os.path.dirname(target)
+        if parent not in self._dirs:
+            os.makedirs(parent, exist_ok=True)
+            self._dirs.add(parent)
+        return target
+
+    def write(self, name: str, data: bytes):
+        with open(self._target(name), "wb") as fh:
+            fh.write(data)
+
+    def link(self, name: str):
+        source = os.path.join(self.previous, *name.split("/"))
+        target = self._target(name)
+        try:
+            os.link(source, target)
+        except OSError:  # no hard links on this filesystem
+            shutil.copy2(source, target)
+
+
+def deploy_files(files: Files, path: str, keep_previous: bool = True, extra: Optional[dict] = None) -> DeployResult:
+    """
+    Deploy ``(name, content)`` pairs to ``path`` as described in the module docstring.
+    The release that was live is kept for rollback unless ``keep_previous`` is false;
+    older releases (and any left by an interrupted deploy) are removed after the swap.
+    ``extra`` is added to the manifest once ``files`` is exhausted, so it may be filled
+    while the files are produced.
+    """
+    path = os.path.abspath(path.rstrip("/\\"))
+    live = _live_release(path)
+    previous = read_manifest(path)["files"] if live is not None else {}
+    os.makedirs(_releases_dir(path), exist_ok=True)
+    existing = [int(n) for n in os.listdir(_releases_dir(path)) if n.isdigit()]
+    # past any release a crashed deploy left behind
+    number = max(existing, default=0) + 1
+    result = DeployResult(path, live or 0)
+
+    files_out, pending, release = {}, [], None
+    live_site = os.path.join(_release_dir(path, live), SITE_DIR) if live is not None else None
+    for name, content in files:
+        _check_name(name)
+        data = content.encode("utf-8") if isinstance(content, str) else bytes(content)
+        digest = hashlib.sha256(data).hexdigest()
+        files_out[name] = {"sha256": digest, "size": len(data)}
+        if previous.get(name, {}).get("sha256") == digest:
+            result.unchanged += 1
+            if release is None:
+                pending.append(name)  # linked once the first change shows up
+            else:
+                release.link(name)
+            continue
+        if release is None:
+            release = _Release(path, number, live_site)
+            for unchanged in pending:
+                release.link(unchanged)
+            pending = []
+        release.write(name, data)
+        (result.changed if name in previous else result.added).append(name)
+        result.bytes_written += len(data)
+
+    result.removed = sorted(n for n in previous if n not in files_out)
+    if release is None:
+        if not result.removed:
+            return result  # nothing changed: the live release stays as it is
+        release = _Release(path, number, live_site)
+        for unchanged in pending:
+            release.link(unchanged)
+
+    manifest = {
+        **(extra or {}),
+        "release": number,
+        "files": files_out,
+        "added": result.added,
+        "changed": result.changed,
+        "removed": result.removed,
+    }
+    with open(os.path.join(release.root, MANIFEST), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, sort_keys=True, separators=(",", ":"))
+
+    # atomic swap: a new symlink renamed over the old one
+    tmp = f"{path}.swap"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    os.symlink(os.path.relpath(release.site, os.path.dirname(path)), tmp)
+    os.replace(tmp, path)
+    result.release = number
+
+    for old in existing:
+        if old != live or not keep_previous:
+            shutil.rmtree(_release_dir(path, old), ignore_errors=True)
+    return result
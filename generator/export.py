@@ -0,0 +1,192 @@
+"""
+Streaming, deterministic ZIP writer for site exports.
+
+Entries are compressed (raw deflate) on a thread pool while earlier entries are being
+written, with a bounded window of in-flight entries, so memory stays proportional to a
+few files rather than the whole archive. Output goes to any writable binary sink, a file
+path (written to a temp file beside it and renamed into place) or an iterator of byte chunks
+suitable for ``st.download_button`` or an HTTP response body.
+
+Archives are reproducible: entries keep the order they are given in, every timestamp is
+1980-01-01 00:00 and permissions are fixed, so identical inputs give byte-identical ZIPs.
+ZIP64 records are added only when an archive needs them (over 65535 entries or 4 GiB).
+"""
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Tuple, Union
+
+from .storage import atomic_file
+
+# already-compressed outputs are stored as-is
+STORED_EXTENSIONS = (".webp", ".jpg", ".jpeg", ".png", ".gz", ".br")
+CHUNK_SIZE = 1 << 16
+
+_DOS_DATE = (0 << 9) | (1 << 5) | 1  # 1980-01-01
+_DOS_TIME = 0
+_UTF8_FLAG = 0x0800
+_EXTERNAL_ATTR = 0o100644 << 16
+_MADE_BY = (3 << 8) | 45  # unix, spec 4.5
+_MAX32 = 0xFFFFFFFF
+_MAX16 = 0xFFFF
+
+# (name, content) pairs as produced by SiteBuilder
+Files = Iterable[Tuple[str, Union[str, bytes]]]
+# called once per written entry: (name, compress_seconds, size, compressed_size)
+EntryCallback = Callable[[str, float, int, int], None]
+
+
+def _compress(name: str, content: Union[str, bytes], level: int, stored: Tuple[str, ...]):
+    t0 = time.perf_counter()
+    data = content.encode("utf-8") if isinstance(content, str) else bytes(content)
+    crc = zlib.crc32(data)
+    if name.lower().endswith(stored):
+        method, payload = 0, data
+    else:
+        comp = zlib.compressobj(level, zlib.DEFLATED, -15)
+        method, payload = 8, comp.compress(data) + comp.flush()
+    return name, method, crc, len(data), payload, time.perf_counter() - t0
+
+
+def _compressed_entries(files: Files, workers: Optional[int], level: int, stored: Tuple[str, ...]):
+    """
+    Yield compressed entries in input order; with several workers, up to ``2 * workers``
+    entries are compressed ahead of the writer.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for name, content in files:
+            yield _compress(name, content, level, stored)
+        return
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        window = 2 * workers
+        pending = deque()
+        for name, content in files:
+            pending.append(pool.submit(_compress, name, content, level, stored))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def zip_chunks(
+    files: Files,
+    workers: Optional[int] = None,
+    level: int = 6,
+    stored: Tuple[str, ...] = STORED_EXTENSIONS,
+    on_entry: Optional[EntryCallback] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Stream a ZIP archive of ``files`` as byte chunks of at most ``chunk_size`` bytes.
+    """
+    offset = 0
+    central = []
+    for name, method, crc, size, payload, seconds in _compressed_entries(files, workers, level, stored):
+        encoded = name.encode("utf-8")
+        big = size >= _MAX32 or len(payload) >= _MAX32
+        extra = struct.pack("<HHQQ", 1, 16, size, len(payload)) if big else b""
+        header = struct.pack(
+            "<IHHHHHIIIHH",
+            0x04034B50,
+            45 if big else 20,
+            _UTF8_FLAG,
+            method,
+            _DOS_TIME,
+            _DOS_DATE,
+            crc,
+            _MAX32 if big else len(payload),
+            _MAX32 if big else size,
+            len(encoded),
+            len(extra),
+        )
+        yield header + encoded + extra
+        for start in range(0, len(payload), chunk_size):
+            yield payload[start : start + chunk_size]
+        central.append((encoded, method, crc, size, len(payload), offset))
+        offset += len(header) + len(encoded) + len(extra) + len(payload)
+        if on_entry is not None:
+            on_entry(name, seconds, size, len(payload))
+
+    cd_offset, cd = offset, []
+    for encoded, method, crc, size, csize, local_offset in central:
+        fields = [v for v in (size, csize, local_offset) if v >= _MAX32]
+        extra = struct.pack("<HH", 1, 8 * len(fields)) + struct.pack("<%dQ" % len(fields), *fields) if fields else b""
+        cd.append(
+            struct.pack(
+                "<IHHHHHHIIIHHHHHII",
+                0x02014B50,
+                _MADE_BY,
+                45 if fields else 20,
+                _UTF8_FLAG,
+                method,
+                _DOS_TIME,
+                _DOS_DATE,
+                crc,
+                min(csize, _MAX32),
+                min(size, _MAX32),
+                len(encoded),
+                len(extra),
+                0,
+                0,
+                0,
+                _EXTERNAL_ATTR,
+                min(local_offset, _MAX32),
+            )
+            + encoded
+            + extra
+        )
+        if len(cd) >= 256:
+            yield b"".join(cd)
+            offset += sum(map(len, cd))
+            cd = []
+    if cd:
+        yield b"".join(cd)
+        offset += sum(map(len, cd))
+
+    count, cd_size = len(central), offset - cd_offset
+    tail = b""
+    if count >= _MAX16 or cd_size >= _MAX32 or cd_offset >= _MAX32:
+        tail += struct.pack("<IQHHIIQQQQ", 0x06064B50, 44, _MADE_BY, 45, 0, 0, count, count, cd_size, cd_offset)
+        tail += struct.pack("<IIQI", 0x07064B50, 0, offset, 1)
+    tail += struct.pack(
+        "<IHHHHIIH",
+        0x06054B50,
+        0,
+        0,
+        min(count, _MAX16),
+        min(count, _MAX16),
+        min(cd_size, _MAX32),
+        min(cd_offset, _MAX32),
+        0,
+    )
+    yield tail
+
+
+def write_chunks(chunks: Iterable[bytes], sink: Union[str, "os.PathLike", BinaryIO]) -> int:
+    """
+    Write byte chunks to a binary file object, or atomically to a path.
+    Returns the number of bytes written.
+    """
+    if not isinstance(sink, (str, os.PathLike)):
+        total = 0
+        for chunk in chunks:
+            sink.write(chunk)
+            total += len(chunk)
+        return total
+
+    path = os.fspath(sink)
+    with atomic_file(path, prefix=os.path.basename(path) + ".part-") as fh:
+        return write_chunks(chunks, fh)
+
+
+def write_zip(files: Files, sink: Union[str, "os.PathLike", BinaryIO], **options) -> int:
+    """
+    Write a ZIP of ``files`` to a binary file object or to a path (atomically).
+    Returns the archive size in bytes. ``options`` are passed to ``zip_chunks``.
+    """
+    return write_chunks(zip_chunks(files, **options), sink)
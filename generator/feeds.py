@@ -0,0 +1,373 @@
+"""
+Persistent, revalidating HTTP cache for product feeds (published Google Sheets / CSV links).
+
+Bodies live on disk so they survive restarts and are shared by every worker process.
+Each body is stored under its content digest, so a stream opened for some metadata always
+has the content that metadata describes, even if a refresh has replaced it since.
+Within ``ttl`` seconds a feed is served without touching the network; after that it is
+revalidated with If-None-Match / If-Modified-Since so an unchanged sheet costs a 304.
+Each feed's ttl is shortened by up to ``jitter`` (a fraction, fixed per fetch) so feeds
+fetched together do not all expire together.
+
+Concurrent fetches of one URL within a process share a single request (single flight),
+and at most ``max_per_host`` requests run against any one host. With ``background`` on
+(the default cache), an expired feed that has been fetched before is served from disk
+immediately while it is revalidated on a background thread, so rendering only waits on
+the network for a feed it has never seen.
+
+Configuration (environment, read when the default cache is first created):
+    TITAN_FEED_CACHE_DIR   cache directory (default ~/.cache/titan/feeds)
+    TITAN_FEED_TTL         seconds a feed is served without revalidation (default 300)
+    TITAN_FEED_MAX_ENTRIES maximum cached feeds (default 256)
+    TITAN_FEED_MAX_BYTES   maximum total body bytes (default 256 MiB)
+    TITAN_FEED_BACKGROUND  serve expired feeds while revalidating in the background (default 1)
+    TITAN_FEED_PER_HOST    concurrent requests per host (default 4)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Optional, TextIO
+from urllib.parse import urlsplit
+
+from .storage import atomic_file, atomic_write, default_cache_dir
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+    import requests
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class FeedCache:
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        ttl: float = 300.0,
+        max_entries: int = 256,
+        max_bytes: int = 256 * 1024 * 1024,
+        timeout: float = 10.0,
+        session: Optional["requests.Session"] = None,
+        background: bool = False,
+        max_per_host: int = 4,
+        jitter: float = 0.1,
+        refresh_workers: int = 4,
+    ):
+        self.cache_dir = cache_dir or default_cache_dir("TITAN_FEED_CACHE_DIR", "feeds")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._session = session
+        self.background = background
+        self.max_per_host = max(1, max_per_host)
+        self.jitter = jitter
+        self.refresh_workers = refresh_workers
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._hosts: Dict[str, threading.BoundedSemaphore] = {}
+        self._refresher: Optional["ThreadPoolExecutor"] = None
+        self._refresher_pid: Optional[int] = None
+        self._refreshing: Dict[str, "Future"] = {}
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "revalidated": 0,
+            "refreshed": 0,
+            "stale": 0,
+            "errors": 0,
+            "coalesced": 0,
+            "background": 0,
+        }
+
+    @property
+    def session(self) -> "requests.Session":
+        # requests is imported (and the pooled session built) on the first network fetch
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._make_session()
+        return self._session
+
+    @staticmethod
+    def _make_session() -> "requests.Session":
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    # --- on-disk entries ---
+    #   <sha256(url)>.json             metadata of the current body
+    #   <sha256(url)>-<digest>.body    a body, named by its content digest
+    def _base(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def _meta_path(self, url: str) -> str:
+        return self._base(url) + ".json"
+
+    def _body_path(self, url: str, digest: str) -> str:
+        return f"{self._base(url)}-{digest[:32]}.body"
+
+    def _read_meta(self, url: str) -> Optional[dict]:
+        try:
+            with open(self._meta_path(url), encoding="utf-8") as fh:
+                meta = json.load(fh)
+            if meta.get("url") != url or os.path.getsize(self._body_path(url, meta["digest"])) != meta.get("size"):
+                return None
+            return meta
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _store(self, url: str, resp: "requests.Response", previous: Optional[dict] = None) -> dict:
+        digest = hashlib.sha256()
+        size = 0
+        # named by its digest once the whole body is in
+        with atomic_file(lambda: self._body_path(url, digest.hexdigest()), dir=self.cache_dir) as fh:
+            for chunk in resp.iter_content(CHUNK_SIZE):
+                fh.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        content_type = resp.headers.get("Content-Type", "")
+        meta = {
+            "url": url,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "encoding": resp.encoding if "charset" in content_type.lower() else "utf-8",
+            "fetched_at": time.time(),
+            "size": size,
+            "digest": digest.hexdigest(),
+        }
+        atomic_write(self._meta_path(url), json.dumps(meta).encode("utf-8"))
+        if previous is not None and previous.get("digest") != meta["digest"]:
+            # readers that opened the old body keep it (POSIX); new readers get the new one
+            self._remove(self._body_path(url, previous["digest"]))
+        self._prune()
+        return meta
+
+    def _touch_meta(self, url: str, meta: dict):
+        meta = dict(meta, fetched_at=time.time())
+        atomic_write(self._meta_path(url), json.dumps(meta).encode("utf-8"))
+        return meta
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _prune(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".body"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        total = sum(e[1] for e in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            total -= size
+            self._remove(path)
+            self._remove(os.path.join(self.cache_dir, os.path.basename(path)[:64] + ".json"))
+
+    def _expired(self, url: str, meta: dict) -> bool:
+        # the same fraction for a given fetch, spread across feeds and fetches
+        seed = hashlib.sha256(f"{url}|{meta['fetched_at']}".encode("utf-8")).digest()
+        spread = int.from_bytes(seed[:4], "big") / 2**32
+        return time.time() - meta["fetched_at"] >= self.ttl * (1 - self.jitter * spread)
+
+    # --- network ---
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            slot = self._hosts.get(host)
+            if slot is None:
+                slot = self._hosts[host] = threading.BoundedSemaphore(self.max_per_host)
+        return slot
+
+    def _fetch(self, url: str, meta: Optional[dict]) -> dict:
+        import requests
+
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            with self._host_slot(url):
+                with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as resp:
+                    if meta is not None and resp.status_code == 304:
+                        self._count("revalidated")
+                        return dict(self._touch_meta(url, meta), status="revalidated")
+                    resp.raise_for_status()
+                    status = "refreshed" if meta is not None else "miss"
+                    self._count("refreshed" if meta is not None else "misses")
+                    return dict(self._store(url, resp, meta), status=status)
+        except requests.RequestException:
+            self._count("errors")
+            if meta is None:
+                raise
+            # keep serving the last good copy rather than dropping the catalog
+            self._count("stale")
+            return dict(meta, status="stale")
+
+    def _single_flight(self, url: str, fetch: Callable[[], dict]) -> dict:
+        """
+        Run ``fetch`` unless a fetch of ``url`` is already in flight, in which case wait
+        for that one and share its result (or its exception).
+        """
+        with self._lock:
+            flight = self._flights.get(url)
+            leader = flight is None
+            if leader:
+                flight = self._flights[url] = _Flight()
+        if not leader:
+            self._count("coalesced")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return dict(flight.result)
+        try:
+            flight.result = fetch()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[url]
+            flight.done.set()
+
+    def _refresh_pool(self) -> "ThreadPoolExecutor":
+        # threads do not survive a fork (batch and service workers): one pool per process
+        if self._refresher is None or self._refresher_pid != os.getpid():
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._refresher = ThreadPoolExecutor(self.refresh_workers, thread_name_prefix="titan-feed-refresh")
+            self._refresher_pid = os.getpid()
+            self._refreshing = {}
+        return self._refresher
+
+    def _refresh_later(self, url: str, meta: dict):
+        def refresh():
+            try:
+                self._single_flight(url, lambda: self._fetch(url, meta))
+            except Exception:
+                pass  # counted in errors; the next request retries
+            finally:
+                with self._lock:
+                    self._refreshing.pop(url, None)
+
+        with self._lock:
+            pool = self._refresh_pool()
+            if url in self._refreshing or url in self._flights:
+                return
+            self.counters["background"] += 1
+            # the worker's cleanup takes the lock, so it cannot run before this entry exists
+            self._refreshing[url] = pool.submit(refresh)
+
+    # --- public API ---
+    def get_meta(self, url: str) -> dict:
+        """
+        Ensure ``url`` is cached and fresh, returning its metadata (etag, digest, size...).
+        ``status`` says how it was served: hit, miss, revalidated, refreshed or stale
+        (the last good copy, after an error or while a background refresh runs).
+        """
+        meta = self._read_meta(url)
+        if meta is not None and not self._expired(url, meta):
+            self._count("hits")
+            return dict(meta, status="hit")
+        if meta is not None and self.background:
+            self._refresh_later(url, meta)
+            self._count("stale")
+            return dict(meta, status="stale")
+        return self._single_flight(url, lambda: self._fetch(url, meta))
+
+    def wait_refreshes(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for scheduled background refreshes; True if none are left running.
+        """
+        from concurrent.futures import wait
+
+        with self._lock:
+            pending = list(self._refreshing.values())
+        return not wait(pending, timeout).not_done
+
+    def close(self):
+        if self._refresher is not None and self._refresher_pid == os.getpid():
+            self._refresher.shutdown(wait=False, cancel_futures=True)
+        self._refresher = None
+
+    def get_text(self, url: str) -> str:
+        with self.open(url) as fh:
+            return fh.read()
+
+    def open(self, url: str, meta: Optional[dict] = None) -> TextIO:
+        """
+        Open the cached body of ``url`` as a text stream for incremental parsing.
+
+        With ``meta`` from a prior get_meta() call, the body it describes is opened, or
+        FileNotFoundError is raised once a refresh or eviction has removed it (call
+        get_meta again). Without it, the current body is opened.
+        """
+        if meta is not None:
+            return self._open_body(url, meta)
+        try:
+            return self._open_body(url, self.get_meta(url))
+        except FileNotFoundError:
+            # replaced or evicted between get_meta and open: the entry is fetched again
+            return self._open_body(url, self.get_meta(url))
+
+    def _open_body(self, url: str, meta: dict) -> TextIO:
+        body_path = self._body_path(url, meta["digest"])
+        fh = open(body_path, encoding=meta.get("encoding") or "utf-8", errors="replace", newline="")
+        os.utime(body_path)  # mark as recently used for eviction
+        return fh
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
+
+
+_default_cache: Optional[FeedCache] = None
+_default_lock = threading.Lock()
+
+
+def default_feed_cache() -> FeedCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = FeedCache(
+                ttl=float(os.environ.get("TITAN_FEED_TTL", 300)),
+                max_entries=int(os.environ.get("TITAN_FEED_MAX_ENTRIES", 256)),
+                max_bytes=int(os.environ.get("TITAN_FEED_MAX_BYTES", 256 * 1024 * 1024)),
+                background=os.environ.get("TITAN_FEED_BACKGROUND", "1").strip().lower() not in ("0", "false", "no", "off"),
+                max_per_host=int(os.environ.get("TITAN_FEED_PER_HOST", 4)),
+            )
+        return _default_cache
@@ -0,0 +1,158 @@
+"""
+Dependency-tracked incremental rendering.
+
+Every output file is described by a Page: the sanitized context keys it reads (found by
+walking the template AST, including extends/include chains) and a hash of the template
+sources involved. A page's cache key is the hash of exactly those inputs, so editing
+``terms_body`` re-renders only the files that read it, and the export fingerprint (the
+hash of every page key) changes exactly when some output would change.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Callable, FrozenSet, Iterable, List, Optional, Tuple
+
+from jinja2 import Environment, meta, nodes
+
+# sanitized key -> raw context keys it is derived from (anything else maps to itself)
+DERIVED_KEYS = {
+    "privacy_html": ("priv_body",),
+    "terms_html": ("terms_body",),
+    "biz_phone_wa": ("biz_phone",),
+    "products": ("sheet_url", "products_page_size"),
+    "products_more": ("sheet_url", "products_page_size"),
+    "feed_digest": ("sheet_url",),
+    "images": ("optimize_images",),
+    "asset_prefix": (),
+    "catalog_index": ("sheet_url", "products_page_size"),
+    "catalog": ("sheet_url", "products_page_size"),
+    # "stylesheet" (the exported CSS) maps to whatever partials/site.css.j2 reads; SiteBuilder
+    # passes that from the registry's dependency analysis (see input_keys)
+}
+
+
+def _jsonable(value):
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return str(value)
+
+
+def _fragment_refs(ast) -> Iterable[str]:
+    # {{ fragment("partials/nav.html.j2") }} (see TemplateRegistry) reads that template too
+    for call in ast.find_all(nodes.Call):
+        if isinstance(call.node, nodes.Name) and call.node.name == "fragment" and call.args:
+            if isinstance(call.args[0], nodes.Const):
+                yield call.args[0].value
+
+
+def template_dependencies(env: Environment, name: str) -> Tuple[FrozenSet[str], str]:
+    """
+    Return ``(keys, source_hash)`` for template ``name``: the undeclared variables it and
+    every template it extends, includes or renders as a fragment read, and a hash over all
+    of their sources.
+    """
+    sources, keys, pending = {}, set(), [name]
+    while pending:
+        current = pending.pop()
+        if current in sources:
+            continue
+        source, _, _ = env.loader.get_source(env, current)
+        sources[current] = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        ast = env.parse(source)
+        keys |= meta.find_undeclared_variables(ast)
+        pending.extend(ref for ref in meta.find_referenced_templates(ast) if ref)
+        pending.extend(_fragment_refs(ast))
+    keys -= set(env.globals)
+    digest = hashlib.sha256("".join(f"{n}:{h};" for n, h in sorted(sources.items())).encode("utf-8"))
+    return frozenset(keys), digest.hexdigest()
+
+
+def input_keys(keys: Iterable[str], derived: Optional[Mapping] = None) -> List[str]:
+    """
+    Map sanitized template keys back to the raw context keys an operator edits.
+    ``derived`` adds mappings known only at runtime (sanitized key -> keys it is built from).
+    """
+    derived = {**DERIVED_KEYS, **derived} if derived else DERIVED_KEYS
+    out = set()
+    for k in keys:
+        out.update(derived.get(k, (k,)))
+    return sorted(out)
+
+
+class Page:
+    """
+    One output file: its name, the sanitized keys it reads, a source hash covering the
+    template/code that produces it, and a ``render(ctx) -> str`` callable.
+    """
+
+    __slots__ = ("name", "keys", "source_hash", "render")
+
+    def __init__(self, name: str, keys: FrozenSet[str], source_hash: str, render: Callable[[Mapping], str]):
+        self.name = name
+        self.keys = frozenset(keys)
+        self.source_hash = source_hash
+        self.render = render
+
+    def key(self, ctx: Mapping) -> str:
+        picked = {k: ctx.get(k) for k in sorted(self.keys)}
+        raw = json.dumps([self.name, self.source_hash, picked], sort_keys=True, default=_jsonable)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    Thread-safe LRU of rendered page output keyed by Page.key().
+    """
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, page: Page, ctx: Mapping) -> Tuple[str, bool]:
+        """
+        Return ``(output, cache_hit)`` for ``page``, rendering only on a miss.
+        """
+        return self.get_or_create(page.key(ctx), lambda: page.render(ctx))
+
+    def get_or_create(self, key: str, render: Callable[[], str]) -> Tuple[str, bool]:
+        """
+        Return ``(output, cache_hit)`` for an arbitrary key, calling ``render()`` on a miss.
+        """
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html, True
+            self.misses += 1
+        html = render()
+        with self._lock:
+            self._entries[key] = html
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return html, False
+
+    def get_or_render(self, page: Page, ctx: Mapping) -> str:
+        return self.render(page, ctx)[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        return {"size": size, "hits": self.hits, "misses": self.misses}
+
+
+# process-wide caches shared by every SiteBuilder unless one is given explicitly
+default_render_cache = RenderCache()
+# rendered nav/footer/hero fragments, keyed by the fields each reads (shared across sites)
+default_fragment_cache = RenderCache(maxsize=2048)
@@ -1,3 +0,0 @@
-from .site_builder import SiteBuilder
-
-__all__ = ["SiteBuilder"]
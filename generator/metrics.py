@@ -0,0 +1,150 @@
+"""
+Build instrumentation: stage timings, byte sizes, product counts and cache hits.
+
+SiteBuilder reports every stage (sanitize, fetch, parse, images, fragment, render, postprocess,
+zip_write, build) to an observer. Attach one for the whole builder (``SiteBuilder(observer=...)``) or just for the
+current thread/task:
+
+    collector = MetricsCollector()
+    with observing(collector):
+        builder.build_zip(context, out)
+    print(collector.to_prometheus())
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+STAGES = ("sanitize", "fetch", "parse", "images", "fragment", "render", "postprocess", "zip_write", "build")
+
+
+class BuildObserver:
+    """
+    Receives one call per completed stage. ``attrs`` may include ``file``, ``bytes``,
+    ``bytes_before``, ``compressed_bytes``, ``products`` and ``cache_hit``.
+    """
+
+    def on_stage(self, stage: str, seconds: float, **attrs):
+        pass
+
+
+class _Fanout(BuildObserver):
+    def __init__(self, observers):
+        self.observers = observers
+
+    def on_stage(self, stage: str, seconds: float, **attrs):
+        for obs in self.observers:
+            obs.on_stage(stage, seconds, **attrs)
+
+
+_current: ContextVar[Optional[BuildObserver]] = ContextVar("titan_build_observer", default=None)
+
+
+@contextmanager
+def observing(observer: BuildObserver):
+    """
+    Report stages from builds in the current thread/task to ``observer``.
+    """
+    token = _current.set(observer)
+    try:
+        yield observer
+    finally:
+        _current.reset(token)
+
+
+def resolve_observer(builder_observer: Optional[BuildObserver]) -> Optional[BuildObserver]:
+    scoped = _current.get()
+    if builder_observer is None:
+        return scoped
+    if scoped is None or scoped is builder_observer:
+        return builder_observer
+    return _Fanout([builder_observer, scoped])
+
+
+@contextmanager
+def stage(name: str, observer: Optional[BuildObserver], **attrs):
+    """
+    Time the enclosed block and report it; the yielded dict can be filled with attributes.
+    A no-op when no observer is attached.
+    """
+    if observer is None:
+        yield attrs
+        return
+    t0 = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        observer.on_stage(name, time.perf_counter() - t0, **attrs)
+
+
+class MetricsCollector(BuildObserver):
+    """
+    Keeps the events of the most recent build (per file, at most ``max_events``) plus
+    running totals per stage, so its size does not grow with the number of exported files.
+    Call ``reset()`` before a build to scope ``events``/``breakdown()`` to it.
+    """
+
+    def __init__(self, max_events: int = 10000):
+        self.max_events = max_events
+        self.events: List[dict] = []
+        self.totals: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def on_stage(self, stage: str, seconds: float, **attrs):
+        event = dict(attrs, stage=stage, seconds=seconds)
+        with self._lock:
+            if len(self.events) < self.max_events:
+                self.events.append(event)
+            t = self.totals.setdefault(stage, {"calls": 0, "seconds": 0.0, "bytes": 0, "products": 0, "cache_hits": 0})
+            t["calls"] += 1
+            t["seconds"] += seconds
+            t["bytes"] += int(attrs.get("bytes") or 0)
+            t["products"] += int(attrs.get("products") or 0)
+            t["cache_hits"] += 1 if attrs.get("cache_hit") else 0
+
+    def reset(self):
+        with self._lock:
+            self.events = []
+
+    def breakdown(self) -> List[dict]:
+        """
+        Per-stage summary of the recorded events (the last build after ``reset()``).
+        """
+        rows: Dict[str, dict] = {}
+        with self._lock:
+            events = list(self.events)
+        for e in events:
+            row = rows.setdefault(e["stage"], {"stage": e["stage"], "calls": 0, "seconds": 0.0, "bytes": 0, "bytes_before": 0, "cache_hits": 0})
+            row["calls"] += 1
+            row["seconds"] += e["seconds"]
+            row["bytes"] += int(e.get("bytes") or 0)
+            row["bytes_before"] += int(e.get("bytes_before") or 0)
+            row["cache_hits"] += 1 if e.get("cache_hit") else 0
+        order = {s: i for i, s in enumerate(STAGES)}
+        return sorted(rows.values(), key=lambda r: order.get(r["stage"], len(order)))
+
+    def to_json(self) -> str:
+        with self._lock:
+            totals = [dict(v, stage=k) for k, v in sorted(self.totals.items())]
+            events = list(self.events)
+        return json.dumps({"breakdown": self.breakdown(), "events": events, "totals": totals}, default=str)
+
+    def to_prometheus(self, prefix: str = "titan") -> str:
+        metrics = (
+            ("stage_seconds_total", "seconds", "Seconds spent per build stage"),
+            ("stage_calls_total", "calls", "Completed build stage invocations"),
+            ("stage_bytes_total", "bytes", "Bytes produced per build stage"),
+            ("stage_products_total", "products", "Products handled per build stage"),
+            ("stage_cache_hits_total", "cache_hits", "Build stage invocations served from cache"),
+        )
+        with self._lock:
+            items = sorted(self.totals.items())
+        lines = []
+        for name, field, help_text in metrics:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for stage_name, t in items:
+                lines.append(f'{prefix}_{name}{{stage="{stage_name}"}} {t[field]}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,102 @@
+"""
+Post-render output stage for exports: shared stylesheet, safe HTML minification and
+precompressed ``.gz``/``.br`` siblings that static hosts can serve directly.
+
+Minification only touches text between tags (whitespace runs collapse to one space, as a
+browser would render them) and drops plain comments. Tags, attribute values and the bodies
+of <script>, <pre> and <textarea> are left byte-for-byte intact; <style> bodies get the
+CSS minifier.
+"""
+import gzip
+import hashlib
+import re
+from typing import Iterator, List, Tuple, Union
+
+try:  # optional: Brotli siblings are emitted only when the package is installed
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COMPRESSIBLE = (".html", ".css", ".js", ".json", ".xml", ".txt", ".svg")
+MIN_COMPRESS_BYTES = 256
+
+_PROTECTED = re.compile(r"(<(script|pre|textarea|style)\b[^>]*>.*?</\2\s*>)", re.S | re.I)
+_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.S)  # conditional comments are kept
+_TAG_OR_COMMENT = re.compile(r"(<!--.*?-->|<[^>]*>)", re.S)
+# HTML whitespace only; \s would also eat non-breaking spaces
+_WS = re.compile(r"[ \t\n\r\f]+")
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_PUNCT = re.compile(r"\s*([{};,>])\s*")
+# "prop : value" inside a declaration block; "a :hover" in a selector is left alone
+_CSS_COLON = re.compile(r"(?<=[\w-])\s*:\s*(?=[^{}]*[;}])|:\s+")
+
+
+def minify_css(css: str) -> str:
+    css = _CSS_COMMENT.sub("", css)
+    css = _WS.sub(" ", css)
+    css = _CSS_PUNCT.sub(r"\1", css)
+    css = _CSS_COLON.sub(":", css)
+    return css.replace(";}", "}").strip()
+
+
+def _minify_markup(chunk: str) -> str:
+    out = []
+    for part in _TAG_OR_COMMENT.split(_COMMENT.sub("", chunk)):
+        if part:
+            out.append(part if part.startswith("<") else _WS.sub(" ", part))
+    return "".join(out)
+
+
+def minify_html(html: str) -> str:
+    out = []
+    pos = 0
+    for m in _PROTECTED.finditer(html):
+        out.append(_minify_markup(html[pos : m.start()]))
+        block = m.group(1)
+        if m.group(2).lower() == "style":
+            open_end = block.index(">") + 1
+            close_start = block.lower().rindex("</style")
+            block = block[:open_end] + minify_css(block[open_end:close_start]) + block[close_start:]
+        out.append(block)
+        pos = m.end()
+    out.append(_minify_markup(html[pos:]))
+    return "".join(out).strip()
+
+
+def hashed_name(stem: str, ext: str, content: str) -> str:
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:12]
+    return f"{stem}.{digest}{ext}"
+
+
+def precompressed(name: str, data: bytes) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yield ``.gz`` (and ``.br`` when Brotli is available) siblings worth shipping for ``name``.
+    Output is deterministic (no embedded timestamp).
+    """
+    if not name.lower().endswith(COMPRESSIBLE) or len(data) < MIN_COMPRESS_BYTES:
+        return
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        yield name + ".gz", gz
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data):
+            yield name + ".br", br
+
+
+def optimize_file(name: str, content: Union[str, bytes]) -> Tuple[List[Tuple[str, bytes]], int]:
+    """
+    Minify an HTML/CSS file and add its precompressed siblings.
+    Returns ``([(name, data), *siblings], bytes_before)``.
+    """
+    lower = name.lower()
+    if isinstance(content, str):
+        before = len(content.encode("utf-8"))
+        if lower.endswith(".html"):
+            content = minify_html(content)
+        elif lower.endswith(".css"):
+            content = minify_css(content)
+        data = content.encode("utf-8")
+    else:
+        before, data = len(content), content
+    return [(name, data)] + list(precompressed(name, data)), before
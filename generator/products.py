@@ -0,0 +1,227 @@
+"""
+Streaming product-sheet parsing.
+
+Rows are parsed straight from the cached feed file and yielded one product at a time,
+so memory stays bounded no matter how large the sheet is. The delimiter is sniffed
+from a bounded prefix (the first few lines, at most SNIFF_BYTES).
+
+Each product is a Product: a slotted, read-only mapping of the display fields (``p.name``
+and ``p["name"]`` both work) with the price parsed once into ``p.amount``. A whole catalog
+can be held as a ProductTable, which stores the fields as columns of shared strings and a
+numeric price column, with price-order and first-letter indexes.
+"""
+import csv
+import itertools
+import math
+import re
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+SNIFF_LINES = 5
+SNIFF_BYTES = 64 * 1024
+HEADER_NAMES = ("name", "service_name", "product", "title")
+FIELDS = ("name", "price", "desc", "img")
+_END = object()
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def price_value(price: str) -> Optional[float]:
+    """
+    Numeric value of a display price such as "₹1,200" or "$ 19.99"; None if there is none.
+    """
+    m = _NUMBER.search((price or "").replace(",", ""))
+    return float(m.group()) if m else None
+
+
+def product_amount(product: Mapping) -> Optional[float]:
+    # parsed once for Product records; plain dicts are parsed on demand
+    if isinstance(product, Product):
+        return product.amount
+    return price_value(product.get("price", ""))
+
+
+class Product(Mapping):
+    """
+    One product: ``name``, ``price`` (display text), ``desc`` and ``img`` as a read-only
+    mapping, plus ``amount`` (the price as a number, or None).
+    """
+
+    __slots__ = FIELDS + ("amount",)
+
+    def __init__(self, name: str = "", price: str = "", desc: str = "", img: str = "", amount: Optional[float] = None):
+        self.name = name
+        self.price = price
+        self.desc = desc
+        self.img = img
+        self.amount = price_value(price) if amount is None else amount
+
+    def __getitem__(self, key):
+        if key in FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __repr__(self):
+        return f"Product({', '.join(f'{f}={getattr(self, f)!r}' for f in FIELDS)})"
+
+
+class ProductTable(Sequence):
+    """
+    A catalog in columns: one list per field (equal strings are stored once) and the parsed
+    prices in a float array (NaN when unpriced). Indexing and iteration give Products.
+    ``by_price`` and ``by_letter`` are computed on first use.
+    """
+
+    __slots__ = FIELDS + ("amounts", "_strings", "_by_price", "_by_letter")
+
+    def __init__(self, products: Iterable[Mapping] = ()):
+        for f in FIELDS:
+            setattr(self, f, [])
+        self.amounts = array("d")
+        self._strings: Dict[str, str] = {}
+        self._by_price = None
+        self._by_letter = None
+        self.extend(products)
+
+    def _shared(self, value: str) -> str:
+        return self._strings.setdefault(value, value)
+
+    def append(self, product: Mapping):
+        for f in FIELDS:
+            getattr(self, f).append(self._shared(product.get(f, "")))
+        amount = product_amount(product)
+        self.amounts.append(math.nan if amount is None else amount)
+        self._by_price = self._by_letter = None
+
+    def extend(self, products: Iterable[Mapping]):
+        for product in products:
+            self.append(product)
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        amount = self.amounts[index]
+        return Product(
+            self.name[index], self.price[index], self.desc[index], self.img[index], None if math.isnan(amount) else amount
+        )
+
+    def amount(self, index: int) -> Optional[float]:
+        value = self.amounts[index]
+        return None if math.isnan(value) else value
+
+    @property
+    def by_price(self) -> array:
+        """
+        Product ids from cheapest to dearest; unpriced products last, in sheet order.
+        """
+        if self._by_price is None:
+            amounts = self.amounts
+            priced = sorted((i for i in range(len(amounts)) if not math.isnan(amounts[i])), key=amounts.__getitem__)
+            unpriced = (i for i in range(len(amounts)) if math.isnan(amounts[i]))
+            self._by_price = array("L", itertools.chain(priced, unpriced))
+        return self._by_price
+
+    @property
+    def by_letter(self) -> Dict[str, array]:
+        """
+        Product ids grouped by the upper-cased first character of the name ("#" for
+        names starting with a digit or symbol), in sheet order.
+        """
+        if self._by_letter is None:
+            buckets: Dict[str, array] = {}
+            for i, name in enumerate(self.name):
+                first = name[:1].upper()
+                buckets.setdefault(first if first.isalpha() else "#", array("L")).append(i)
+            self._by_letter = buckets
+        return self._by_letter
+
+    def sorted_by_price(self, reverse: bool = False) -> Iterator[Product]:
+        ids = self.by_price
+        if reverse:
+            # dearest first; unpriced products stay last
+            priced = sum(1 for a in self.amounts if not math.isnan(a))
+            ids = itertools.chain(reversed(ids[:priced]), ids[priced:])
+        return (self[i] for i in ids)
+
+    def starting_with(self, letter: str) -> List[Product]:
+        return [self[i] for i in self.by_letter.get(letter.upper(), ())]
+
+    def price_range(self) -> Tuple[Optional[float], Optional[float]]:
+        priced = [a for a in self.amounts if not math.isnan(a)]
+        return (min(priced), max(priced)) if priced else (None, None)
+
+
+def sheet_csv_url(sheet_url: str) -> str:
+    """
+    Convert a Google Sheets edit URL to its CSV export link; other URLs pass through.
+    """
+    url = sheet_url.strip()
+    if "docs.google.com/spreadsheets" in url:
+        url = re.sub(r"/edit.*$", "/export?format=csv", url)
+    return url
+
+
+def _read_prefix(stream: TextIO) -> List[str]:
+    lines, size = [], 0
+    while len(lines) < SNIFF_LINES and size < SNIFF_BYTES:
+        line = stream.readline(SNIFF_BYTES - size)
+        if not line:
+            break
+        lines.append(line)
+        size += len(line)
+    return lines
+
+
+def _sniff_delimiter(prefix: List[str]) -> str:
+    try:
+        return csv.Sniffer().sniff(prefix[0]).delimiter
+    except Exception:
+        chunk = "".join(prefix)
+        return "|" if "|" in chunk else ","
+
+
+def iter_products(stream: TextIO) -> Iterator[Product]:
+    """
+    Yield Products (name, price, desc, img) from a CSV or pipe-delimited text stream.
+    A leading header row is detected and skipped.
+    """
+    prefix = _read_prefix(stream)
+    if not prefix:
+        return
+    reader = csv.reader(itertools.chain(prefix, stream), delimiter=_sniff_delimiter(prefix))
+
+    first = True
+    for r in reader:
+        if not any(cell.strip() for cell in r):
+            continue
+        if first:
+            first = False
+            if any(c.strip().lower() in HEADER_NAMES for c in r):
+                continue
+        yield Product(*(cell.strip() for cell in r[:4]))
+
+
+def paginate(items: Iterable, page_size: int) -> Iterator[Tuple[int, list, bool]]:
+    """
+    Yield ``(page_number, items, has_next)`` for consecutive pages of ``page_size`` items,
+    holding at most one page (plus one look-ahead item) in memory.
+    """
+    it = iter(items)
+    page = list(itertools.islice(it, page_size))
+    number = 1
+    while page:
+        peek = next(it, _END)
+        yield number, page, peek is not _END
+        if peek is _END:
+            return
+        page = [peek] + list(itertools.islice(it, page_size - 1))
+        number += 1
@@ -0,0 +1,160 @@
+"""
+Warm template registry: resolves, compiles and validates every template once per process.
+
+Logical page names map to fallback chains (contact -> about -> index), which are resolved a
+single time at startup instead of probing with try/except on every render. Compiled
+bytecode is persisted on disk so new Streamlit sessions and batch workers skip parsing.
+
+Templates can render shared chrome with ``{{ fragment("partials/nav.html.j2") }}``: the
+partial is rendered from only the fields it reads and cached on them, so every page of a
+site (and every site with the same values) reuses one rendering.
+
+Configuration (environment):
+    TITAN_TEMPLATE_CACHE_DIR   bytecode cache directory (default ~/.cache/titan/jinja)
+"""
+import os
+import threading
+import time
+from typing import Dict, FrozenSet, Optional, Tuple
+from urllib.parse import quote_plus
+
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    Template,
+    TemplateNotFound,
+    pass_context,
+    select_autoescape,
+)
+from markupsafe import Markup
+
+from .incremental import Page, RenderCache, default_fragment_cache, template_dependencies
+from .metrics import resolve_observer, stage
+from .storage import default_cache_dir
+
+# Determine templates path (repo templates/ folder)
+TEMPLATES_PATH = os.path.join(os.path.dirname(__file__), "templates")
+if not os.path.isdir(TEMPLATES_PATH):
+    TEMPLATES_PATH = os.path.join(os.getcwd(), "templates")
+
+# logical page -> template candidates, first existing one wins
+FALLBACKS = {
+    "home": ("index.html.j2",),
+    "about": ("about.html.j2", "index.html.j2"),
+    "contact": ("contact.html.j2", "about.html.j2", "index.html.j2"),
+    "products": ("products.html.j2", "index.html.j2"),
+    "product": ("product.html.j2", "products.html.j2", "index.html.j2"),
+    "stylesheet": ("partials/site.css.j2",),
+}
+
+
+class _CountingBytecodeCache(FileSystemBytecodeCache):
+    def __init__(self, directory: str):
+        super().__init__(directory)
+        self.hits = 0
+        self.misses = 0
+
+    def load_bytecode(self, bucket):
+        super().load_bytecode(bucket)
+        if bucket.code is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+
+class TemplateRegistry:
+    def __init__(
+        self,
+        templates_path: str = TEMPLATES_PATH,
+        cache_dir: Optional[str] = None,
+        fragment_cache: Optional[RenderCache] = None,
+    ):
+        cache_dir = cache_dir or default_cache_dir("TITAN_TEMPLATE_CACHE_DIR", "jinja")
+        os.makedirs(cache_dir, exist_ok=True)
+        self.bytecode_cache = _CountingBytecodeCache(cache_dir)
+        self.env = Environment(
+            loader=FileSystemLoader(templates_path),
+            autoescape=select_autoescape(["html", "xml"]),
+            bytecode_cache=self.bytecode_cache,
+            auto_reload=False,  # templates are resolved once; no per-render mtime checks
+        )
+        # url_encode filter for building WA links safely in templates
+        self.env.filters["url_encode"] = lambda v: quote_plus(str(v)) if v is not None else ""
+        self.fragments = fragment_cache if fragment_cache is not None else default_fragment_cache
+        self._fragment_pages: Dict[str, Page] = {}
+        self.env.globals["fragment"] = pass_context(lambda context, name: self._fragment(context, name))
+        self.resolved: Dict[str, str] = {}
+        self._pages: Dict[str, Template] = {}
+        # logical page -> (context keys read, hash of every template source involved)
+        self.dependencies: Dict[str, Tuple[FrozenSet[str], str]] = {}
+        self.warm_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def warm(self) -> "TemplateRegistry":
+        """
+        Compile every template (raising on syntax errors) and resolve each fallback chain.
+        Safe to call more than once; only the first call does any work.
+        """
+        with self._lock:
+            if self.warm_seconds is not None:
+                return self
+            t0 = time.perf_counter()
+            for name in self.env.list_templates(extensions=["j2"]):
+                self.env.get_template(name)
+            for page, candidates in FALLBACKS.items():
+                for name in candidates:
+                    try:
+                        self._pages[page] = self.env.get_template(name)
+                    except TemplateNotFound:
+                        continue
+                    self.resolved[page] = name
+                    self.dependencies[page] = template_dependencies(self.env, name)
+                    break
+                else:
+                    raise TemplateNotFound(candidates[-1])
+            self.warm_seconds = time.perf_counter() - t0
+        return self
+
+    def get(self, page: str) -> Template:
+        """
+        Return the compiled template for a logical page name (see FALLBACKS).
+        """
+        if self.warm_seconds is None:
+            self.warm()
+        return self._pages[page]
+
+    def _fragment(self, context, name: str) -> Markup:
+        """
+        Render template ``name`` from only the fields it reads, reusing the cached output.
+        """
+        page = self._fragment_pages.get(name)
+        if page is None:
+            keys, source_hash = template_dependencies(self.env, name)
+            tpl = self.env.get_template(name)
+            page = self._fragment_pages[name] = Page(name, keys, source_hash, lambda ctx: tpl.render(ctx))
+        picked = {k: context[k] for k in page.keys if k in context}
+        with stage("fragment", resolve_observer(None), file=name) as info:
+            html, info["cache_hit"] = self.fragments.render(page, picked)
+        return Markup(html)
+
+    def stats(self) -> dict:
+        return {
+            "warm_seconds": self.warm_seconds,
+            "templates": len(self.env.list_templates(extensions=["j2"])),
+            "resolved": dict(self.resolved),
+            "bytecode_hits": self.bytecode_cache.hits,
+            "bytecode_misses": self.bytecode_cache.misses,
+        }
+
+
+_default_registry: Optional[TemplateRegistry] = None
+_default_lock = threading.Lock()
+
+
+def default_registry() -> TemplateRegistry:
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = TemplateRegistry()
+        return _default_registry
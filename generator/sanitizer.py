@@ -1,14 +1,73 @@
 import re
-import bleach
+import threading
+from collections import OrderedDict
+from typing import Iterable, List
 from urllib.parse import urlparse
 
 ALLOWED_TAGS = ["a","b","i","u","em","strong","p","br","ul","ol","li","h2","h3","img"]
 ALLOWED_ATTRS = {"a":["href","title","rel","target"], "img":["src","alt","width","height"]}
 
+# characters bleach may rewrite; text without any of them comes back unchanged
+_NEEDS_CLEANING = re.compile(r"[<>&\x00-\x08\x0b-\x1f\x7f]")
+CLEAN_CACHE_SIZE = 4096
+
+# Cleaner instances are not thread-safe, so keep one prebuilt per thread (bleach, and
+# html5lib behind it, are imported the first time markup actually needs cleaning)
+_local = threading.local()
+# value -> cleaned value; cleaned outputs are also stored as keys so re-cleaning is a lookup
+_memo: "OrderedDict[str, str]" = OrderedDict()
+_memo_lock = threading.Lock()
+_stats = {"plain": 0, "hits": 0, "misses": 0}
+
+def _cleaner():
+    cleaner = getattr(_local, "cleaner", None)
+    if cleaner is None:
+        from bleach.sanitizer import Cleaner
+
+        cleaner = _local.cleaner = Cleaner(tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRS, strip=True)
+    return cleaner
+
 def clean_html(value: str) -> str:
     if not value:
         return ""
-    return bleach.clean(value, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRS, strip=True)
+    if not _NEEDS_CLEANING.search(value):
+        with _memo_lock:
+            _stats["plain"] += 1
+        return value
+    with _memo_lock:
+        cleaned = _memo.get(value)
+        if cleaned is not None:
+            _memo.move_to_end(value)
+            _stats["hits"] += 1
+            return cleaned
+        _stats["misses"] += 1
+    cleaned = _cleaner().clean(value)
+    with _memo_lock:
+        _memo[value] = cleaned
+        _memo[cleaned] = cleaned
+        while len(_memo) > CLEAN_CACHE_SIZE:
+            _memo.popitem(last=False)
+    return cleaned
+
+def clean_many(values: Iterable[str]) -> List[str]:
+    """
+    Clean a batch of values; duplicates in the batch are cleaned once.
+    """
+    done = {}
+    out = []
+    for v in values:
+        if v not in done:
+            done[v] = clean_html(v)
+        out.append(done[v])
+    return out
+
+def clear_clean_cache():
+    with _memo_lock:
+        _memo.clear()
+
+def clean_stats() -> dict:
+    with _memo_lock:
+        return dict(_stats, size=len(_memo))
 
 def clean_iframe(value: str) -> str:
     if not value:
@@ -0,0 +1,341 @@
+"""
+Headless HTTP render service: the SiteBuilder behind a small JSON API, for pipelines that
+cannot drive the Streamlit UI.
+
+    python -m generator.service --port 8080 --workers 4 --queue 16 --timeout 30
+
+Endpoints (request bodies are a SiteBuilder context as JSON, the same dict app.py builds):
+
+    GET  /healthz            pool size, in-flight requests and counters
+    POST /render/<file>      one rendered output file (index.html, about.html, privacy.html, ...)
+    POST /zip                the exported site ZIP, streamed from the shared artifact store
+    POST /products           {"sheet_url", "offset", "limit"} -> parsed products as JSON
+
+Work runs in a pool of worker processes that load the templates and sanitizer once at
+startup. At most ``workers + queue`` requests are admitted at a time; beyond that the
+service answers 503 with Retry-After instead of queueing unboundedly. Requests that take
+longer than ``timeout`` get a 504 (their slot is freed once the worker finishes).
+
+Exports go into the artifact store (see generator.artifacts) that app.py uses, so a site
+exported before is served without building, and the ZIP is sent from disk in chunks.
+"""
+import argparse
+import json
+import mimetypes
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from .artifacts import ArtifactStore, default_artifact_store
+from .export import CHUNK_SIZE
+from .site_builder import SiteBuilder
+
+MAX_BODY = 1 << 20
+MAX_PRODUCTS = 1000
+
+_worker_builder: Optional[SiteBuilder] = None
+_worker_artifacts: Optional[ArtifactStore] = None
+
+
+# --- worker process side ---
+def _init_worker(artifact_root: str, max_bytes: int, max_age: float):
+    global _worker_builder, _worker_artifacts
+    # one warm builder per process; each request already has its own process, so ZIP
+    # entries are compressed inline
+    _worker_builder = SiteBuilder(zip_workers=1)
+    # same directory and limits as the service's store; the HTTP side streams what lands there
+    _worker_artifacts = ArtifactStore(artifact_root, max_bytes, max_age)
+
+
+def _warm(_=None) -> int:
+    return os.getpid()
+
+
+def _render(name: str, context: dict) -> str:
+    return _worker_builder.render_page(name, context)
+
+
+def _zip(context: dict) -> str:
+    return _worker_builder.export_artifact(context, _worker_artifacts)[0]
+
+
+def _products(sheet_url: str, offset: int, limit: int) -> dict:
+    products = _worker_builder.iter_products_from_sheet(sheet_url)
+    out = []
+    try:
+        for i, product in enumerate(products):
+            if i >= offset + limit:
+                return {"products": out, "offset": offset, "more": True}
+            if i >= offset:
+                out.append(dict(product))
+    finally:
+        products.close()
+    return {"products": out, "offset": offset, "more": False}
+
+
+# --- HTTP side ---
+class Busy(Exception):
+    pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, payload, headers: dict = None):
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+    def _content_length(self) -> Optional[int]:
+        """
+        The request's Content-Length, or None (after answering 400) when it is not a
+        non-negative integer; the body cannot be found, so the connection is closed.
+        """
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._json(400, {"error": "invalid Content-Length"}, {"Connection": "close"})
+            return None
+        return length
+
+    def _body(self) -> Optional[dict]:
+        length = self._content_length()
+        if length is None:
+            return None
+        if length > self.server.service.max_body:
+            self._json(413, {"error": "request body too large"}, {"Connection": "close"})
+            return None
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._json(400, {"error": "body must be a JSON object"})
+            return None
+        if not isinstance(body, dict):
+            self._json(400, {"error": "body must be a JSON object"})
+            return None
+        return body
+
+    def _reject(self, status: int, payload):
+        """
+        Answer before reading the request; the unread body is drained so the next request
+        on a keep-alive connection starts where expected, or the connection is closed.
+        """
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if 0 <= length <= self.server.service.max_body:
+            self.rfile.read(length)
+            self._json(status, payload)
+        else:
+            self._json(status, payload, {"Connection": "close"})
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] == "/healthz":
+            self._json(200, self.server.service.stats())
+        else:
+            self._json(404, {"error": "not found"})
+
+    def do_POST(self):
+        service = self.server.service
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/render/"):
+            name = path[len("/render/") :]
+            if name not in service.pages:
+                self._reject(404, {"error": f"unknown page: {name}"})
+                return
+            body = self._body()
+            if body is None:
+                return
+            ok, html = self._call(service, _render, name, body)
+            if ok:
+                content_type = mimetypes.guess_type(name)[0] or "text/plain"
+                self._send(200, html.encode("utf-8"), f"{content_type}; charset=utf-8")
+        elif path == "/zip":
+            body = self._body()
+            if body is None:
+                return
+            ok, key = self._call(service, _zip, body)
+            if ok:
+                self._stream_artifact(service.artifacts, key)
+        elif path == "/products":
+            body = self._body()
+            if body is None:
+                return
+            if not body.get("sheet_url"):
+                self._json(400, {"error": "sheet_url is required"})
+                return
+            try:
+                offset = max(0, int(body.get("offset") or 0))
+                limit = min(MAX_PRODUCTS, max(1, int(body.get("limit") or MAX_PRODUCTS)))
+            except (TypeError, ValueError):
+                self._json(400, {"error": "offset and limit must be integers"})
+                return
+            ok, result = self._call(service, _products, body["sheet_url"], offset, limit)
+            if ok:
+                self._json(200, result)
+        else:
+            self._reject(404, {"error": "not found"})
+
+    def _call(self, service: "RenderService", fn, *args):
+        """
+        Run ``fn`` on the pool; answers 503/504/500 itself and returns ``(ok, result)``.
+        """
+        try:
+            return True, service.call(fn, *args)
+        except Busy:
+            self._json(503, {"error": "server busy"}, {"Retry-After": "1"})
+        except FutureTimeout:
+            service.count("timeouts")
+            self._json(504, {"error": f"timed out after {service.timeout:g}s"})
+        except Exception as e:
+            service.count("errors")
+            self._json(500, {"error": f"{type(e).__name__}: {e}"})
+        return False, None
+
+    def _stream_artifact(self, store: ArtifactStore, key: str):
+        # the open file outlives an eviction, so its size and content stay consistent
+        with store.open(key) as fh:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/zip")
+            self.send_header("Content-Length", str(os.fstat(fh.fileno()).st_size))
+            self.send_header("Content-Disposition", 'attachment; filename="site.zip"')
+            self.end_headers()
+            shutil.copyfileobj(fh, self.wfile, CHUNK_SIZE)
+
+    def log_message(self, *args):
+        pass
+
+
+class RenderService:
+    """
+    HTTP server on a background thread in front of a warm process pool.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        timeout: float = 30.0,
+        max_body: int = MAX_BODY,
+        artifacts: Optional[ArtifactStore] = None,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = self.workers * 2 if queue_size is None else queue_size
+        self.timeout = timeout
+        self.max_body = max_body
+        self.pages = tuple(p.name for p in SiteBuilder().pages)
+        self.artifacts = artifacts if artifacts is not None else default_artifact_store()
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.artifacts.root, self.artifacts.max_bytes, self.artifacts.max_age),
+        )
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._lock = threading.Lock()
+        self.inflight = 0
+        self.counters = {"requests": 0, "rejected": 0, "timeouts": 0, "errors": 0}
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.service = self
+        self._thread: Optional[threading.Thread] = None
+
+    def count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self.inflight -= 1
+        self._slots.release()
+
+    def call(self, fn, *args):
+        """
+        Run ``fn(*args)`` on the pool. Raises Busy when every slot is taken and
+        concurrent.futures.TimeoutError after ``timeout`` seconds.
+        """
+        if not self._slots.acquire(blocking=False):
+            self.count("rejected")
+            raise Busy()
+        with self._lock:
+            self.inflight += 1
+            self.counters["requests"] += 1
+        try:
+            future = self.pool.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # the slot stays taken until the worker is actually free again
+        future.add_done_callback(self._release)
+        return future.result(timeout=self.timeout)
+
+    def warm(self) -> "RenderService":
+        """
+        Start every worker process (templates compiled, sanitizer loaded) before serving.
+        """
+        list(self.pool.map(_warm, range(self.workers)))
+        return self
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters, workers=self.workers, queue_size=self.queue_size, inflight=self.inflight)
+
+    def url(self, path: str = "/") -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def start(self) -> "RenderService":
+        self.warm()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.pool.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> "RenderService":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve SiteBuilder renders and exports over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--queue", type=int, default=None, help="requests admitted beyond the workers (default: 2x workers)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    args = parser.parse_args(argv)
+
+    service = RenderService(args.host, args.port, args.workers, args.queue, args.timeout).warm()
+    print(f"Serving on {service.url()} with {service.workers} workers (queue {service.queue_size})")
+    try:
+        service.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.httpd.server_close()
+        service.pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,84 +1,248 @@
+import hashlib
+import itertools
 import os
-import io
-import zipfile
-import csv
 import re
-import requests
-from functools import lru_cache
-from urllib.parse import quote_plus
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-from .sanitizer import clean_html, clean_iframe, ensure_trailing_slash
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, BinaryIO, Iterator, Tuple, Union
 
-# Determine templates path (repo templates/ folder)
-TEMPLATES_PATH = os.path.join(os.path.dirname(__file__), "templates")
-if not os.path.isdir(TEMPLATES_PATH):
-    TEMPLATES_PATH = os.path.join(os.getcwd(), "templates")
+from .assets import ImagePipeline, default_image_pipeline
+from .catalog import CATALOG_INDEX, CatalogBuilder, product_path
+from .context import ContextCache, SanitizedContext, context_hash, default_context_cache
+from .export import CHUNK_SIZE, write_chunks, zip_chunks
+from .feeds import FeedCache, default_feed_cache
+from .incremental import Page, RenderCache, default_render_cache, input_keys
+from .metrics import BuildObserver, observing, resolve_observer, stage
+from .postprocess import hashed_name, minify_css, optimize_file
+from .products import ProductTable, iter_products, paginate, sheet_csv_url
+from .registry import TemplateRegistry, default_registry
+from .sanitizer import clean_html, clean_iframe, clean_many, ensure_trailing_slash
+from .sitemap import LastmodHistory, SitemapWriter
 
-env = Environment(
-    loader=FileSystemLoader(TEMPLATES_PATH), autoescape=select_autoescape(["html", "xml"])
-)
-# url_encode filter for building WA links safely in templates
-env.filters["url_encode"] = lambda v: quote_plus(str(v)) if v is not None else ""
+if TYPE_CHECKING:
+    from .artifacts import ArtifactStore
+    from .deploy import DeployResult
 
+# products shown per inventory page (home page shows the first page)
+PRODUCTS_PAGE_SIZE = 48
 
-@lru_cache(maxsize=32)
-def _fetch_text(url: str) -> str:
-    resp = requests.get(url, timeout=10)
-    resp.raise_for_status()
-    return resp.text
+# image URLs used when the context does not set them
+DEFAULT_IMAGES = {
+    "custom_hero": "https://images.unsplash.com/photo-1519741497674-611481863552?auto=format&fit=crop&q=80&w=1600",
+    "custom_feat": "https://images.unsplash.com/photo-1511795409834-ef04bbd61622?auto=format&fit=crop&q=80&w=800",
+    "custom_gall": "https://images.unsplash.com/photo-1532712938310-34cb3982ef74?auto=format&fit=crop&q=80&w=1600",
+}
+
+# bump when the code-generated (non-template) outputs below change shape
+_CODE_PAGES_VERSION = "3"
+
+# bump when the export writers change their output for the same inputs (minifier, catalog
+# JSON, sitemap, ZIP layout); part of export_fingerprint, so stored artifacts are rebuilt
+_EXPORT_FORMAT_VERSION = "2"
+
+# exported pages left out of the sitemap
+_UNLISTED = ("404.html",)
+
+
+def __getattr__(name):
+    # compatibility: TEMPLATES_PATH and the shared Jinja ``env`` were module globals before
+    # the template registry; resolved on access so importing this module compiles nothing
+    if name == "TEMPLATES_PATH":
+        from .registry import TEMPLATES_PATH
+
+        return TEMPLATES_PATH
+    if name == "env":
+        return default_registry().env
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _truthy(value) -> bool:
+    return value is True or str(value).strip().lower() in ("1", "true", "yes", "on")
 
 
 class SiteBuilder:
-    def __init__(self):
-        self.env = env
+    def __init__(
+        self,
+        context_cache: ContextCache = None,
+        page_size: int = PRODUCTS_PAGE_SIZE,
+        templates: TemplateRegistry = None,
+        render_cache: RenderCache = None,
+        feed_cache: FeedCache = None,
+        observer: BuildObserver = None,
+        images: ImagePipeline = None,
+        optimize_output: bool = True,
+        zip_workers: int = None,
+    ):
+        self.templates = (templates or default_registry()).warm()
+        self.env = self.templates.env
+        self.page_size = page_size
+        self.context_cache = context_cache if context_cache is not None else default_context_cache
+        self.render_cache = render_cache if render_cache is not None else default_render_cache
+        self.feed_cache = feed_cache
+        # stage timings go to this observer and to any scoped via metrics.observing()
+        self.observer = observer
+        # image optimization runs for contexts with optimize_images set
+        self.images = images
+        # exports get a shared hashed stylesheet, minified HTML and .gz/.br siblings
+        self.optimize_output = optimize_output
+        # threads compressing ZIP entries (default: one per core; batch workers use 1)
+        self.zip_workers = zip_workers
+        self.pages, self._product_pages = self._site_pages()
+        self._pages_by_name = {p.name: p for p in self.pages}
+        # the exported stylesheet is built from whatever its template reads
+        self._derived_keys = {"stylesheet": input_keys(self.templates.dependencies["stylesheet"][0])}
+        # raw fields each page reads, used to key live previews without sanitizing
+        self._preview_inputs = {p.name: input_keys(p.keys, self._derived_keys) for p in self.pages}
+        # first inventory page per (feed, feed content, page size), so re-sanitizing after an
+        # unrelated edit does not re-parse the sheet
+        self._product_heads: "OrderedDict[tuple, tuple]" = OrderedDict()
+        # product count per (feed, feed content), for the catalog metadata on the home page
+        self._product_counts: "OrderedDict[tuple, int]" = OrderedDict()
+        self._heads_lock = threading.Lock()
+
+    # --- output files and their dependencies ---
+    def _site_pages(self):
+        """
+        Describe every fixed output file: name, the sanitized keys it reads and how to render it.
+        Paginated product pages and product detail pages are streamed separately
+        (see _iter_product_pages).
+        """
+        pages = []
+        for fname, logical in (("index.html", "home"), ("about.html", "about"), ("contact.html", "contact")):
+            keys, source_hash = self.templates.dependencies[logical]
+            tpl = self.templates.get(logical)
+            pages.append(Page(fname, keys, source_hash, lambda ctx, tpl=tpl: tpl.render(**ctx)))
+
+        code = "code:" + _CODE_PAGES_VERSION
+        pages += [
+            Page("privacy.html", {"privacy_html", "stylesheet"}, code, lambda ctx: self._wrap_basic("Privacy Policy", ctx.get("privacy_html", ""), ctx.get("stylesheet"))),
+            Page("terms.html", {"terms_html", "stylesheet"}, code, lambda ctx: self._wrap_basic("Terms & Conditions", ctx.get("terms_html", ""), ctx.get("stylesheet"))),
+            Page("404.html", {"stylesheet"}, code, lambda ctx: self._wrap_basic("404 - Not Found", "<h1>404</h1><p>Not Found</p>", ctx.get("stylesheet"))),
+            Page("robots.txt", {"prod_url"}, code, lambda ctx: f"User-agent: *\nAllow: /\nSitemap: {ctx.get('prod_url', '')}sitemap.xml"),
+        ]
+        # sitemap.xml is written at the end of the export from every page's content (see _iter_files)
+
+        # paginated inventory: keyed on the feed content rather than the first page held in ctx
+        keys, source_hash = self.templates.dependencies["products"]
+        keys = (keys - {"products", "page_num", "prev_page", "next_page"}) | {"feed_digest", "products_page_size"}
+        keys |= self.templates.dependencies["product"][0] - {"product", "inventory_page"}
+        keys |= {"product_pages"}
+        source_hash = hashlib.sha256((source_hash + self.templates.dependencies["product"][1]).encode("utf-8")).hexdigest()
+        return pages, Page("products/page-N.html", keys, source_hash, None)
+
+    def dependencies(self) -> dict:
+        """
+        Map each output file to the raw context keys it depends on.
+        """
+        out = {p.name: input_keys(p.keys, self._derived_keys) for p in self.pages}
+        out[self._product_pages.name] = input_keys(self._product_pages.keys, self._derived_keys)
+        return out
+
+    def export_fingerprint(self, context: dict) -> str:
+        """
+        Hash of every output's inputs and the export format version: changes exactly when
+        some exported file would change.
+        """
+        ctx = self._sanitize_context(context)
+        keys = [p.key(ctx) for p in self.pages] + [self._product_pages.key(ctx)]
+        # optimized images are resolved at export time from URLs, which are treated as immutable
+        keys.append("images" if _truthy(ctx.get("optimize_images")) else "")
+        keys.append("optimized" if self.optimize_output else "")
+        keys.append("format:" + _EXPORT_FORMAT_VERSION)
+        return hashlib.sha256("".join(keys).encode("utf-8")).hexdigest()
+
+    def render_page(self, name: str, context: dict) -> str:
+        """
+        Render one output file by name, reusing the cached result if its inputs are unchanged.
+        """
+        return self._render(self._pages_by_name[name], self._sanitize_context(context))
+
+    def _render(self, page: Page, ctx: SanitizedContext) -> str:
+        obs = resolve_observer(self.observer)
+        with stage("render", obs, file=page.name) as info, self._scoped(obs):
+            html, info["cache_hit"] = self.render_cache.render(page, ctx)
+            if obs is not None:
+                info["bytes"] = len(html.encode("utf-8"))
+        return html
+
+    def preview(self, name: str, context: dict) -> str:
+        """
+        Render one output file for the live preview. Keyed on the raw fields the page reads
+        (plus the feed content when it shows products), so a rerun after an edit to an
+        unrelated field returns the cached HTML without sanitizing or rendering.
+        """
+        page = self._pages_by_name[name]
+        inputs = self._preview_inputs[name]
+        feed = self._feed_digest(context.get("sheet_url")) if "sheet_url" in inputs else ""
+        key = "preview:" + context_hash(
+            {"page": name, "source": page.source_hash, "feed": feed, "inputs": {k: context.get(k) for k in inputs}}
+        )
+        # render from a context built from this feed content (a memoized one may predate it),
+        # so the output matches the key it is stored under
+        feed_digest = feed if "sheet_url" in inputs else None
+        return self.render_cache.get_or_create(
+            key, lambda: self._render(page, self._sanitize_context(context, feed_digest))
+        )[0]
+
+    def _scoped(self, obs):
+        # fragments rendered inside templates report to the scoped observer (see registry)
+        return observing(obs) if self.observer is not None and obs is not None else nullcontext()
 
     # --- rendering helpers ---
     def render_home(self, context: dict, is_home: bool = False) -> str:
-        ctx = self._sanitize_context(context)
-        tpl = self.env.get_template("index.html.j2")
-        return tpl.render(**ctx)
+        return self.render_page("index.html", context)
 
     def render_about(self, context: dict) -> str:
         """
         Render the about page. Falls back to index if about template missing.
         """
-        ctx = self._sanitize_context(context)
-        try:
-            tpl = self.env.get_template("about.html.j2")
-        except Exception:
-            tpl = self.env.get_template("index.html.j2")
-        return tpl.render(**ctx)
+        return self.render_page("about.html", context)
 
     def render_contact(self, context: dict) -> str:
         """
         Render a contact page. If a contact template doesn't exist, fall back to the about template.
         """
-        ctx = self._sanitize_context(context)
-        try:
-            tpl = self.env.get_template("contact.html.j2")
-        except Exception:
-            # fall back
-            tpl = self.env.get_template("about.html.j2")
-        return tpl.render(**ctx)
+        return self.render_page("contact.html", context)
 
     # --- sanitize and context building ---
-    def _sanitize_context(self, context: dict) -> dict:
+    def _sanitize_context(self, context: dict, feed_digest: str = None) -> SanitizedContext:
+        """
+        Return the memoized SanitizedContext for ``context`` (sanitizing on a cache miss).
+        With ``feed_digest``, a memoized context built from other feed content is rebuilt.
+        Already-sanitized contexts are passed through unchanged.
+        """
+        if isinstance(context, SanitizedContext):
+            return context
+        valid = None if feed_digest is None else (lambda ctx: ctx.get("feed_digest") == feed_digest)
+        with stage("sanitize", resolve_observer(self.observer)) as info:
+            misses = self.context_cache.misses
+            ctx = self.context_cache.get_or_build(context, self._build_sanitized, valid)
+            info["cache_hit"] = self.context_cache.misses == misses
+        return ctx
+
+    def _build_sanitized(self, context: dict, digest: str) -> SanitizedContext:
         out = dict(context)
 
-        # Clean free-text fields
-        for k in [
-            "about_txt",
-            "seo_d",
-            "hero_h",
-            "biz_name",
-            "biz_addr",
-            "biz_email",
-            "biz_cat",
-            "priv_body",
-            "terms_body",
-        ]:
-            if out.get(k):
-                out[k] = clean_html(str(out.get(k)))
+        # Clean free-text fields (one batch; unchanged or plain-text values skip bleach)
+        fields = [
+            k
+            for k in [
+                "about_txt",
+                "seo_d",
+                "hero_h",
+                "biz_name",
+                "biz_addr",
+                "biz_email",
+                "biz_cat",
+                "priv_body",
+                "terms_body",
+            ]
+            if out.get(k)
+        ]
+        for k, cleaned in zip(fields, clean_many(str(out[k]) for k in fields)):
+            out[k] = cleaned
 
         # sanitize iframe
         out["map_iframe"] = clean_iframe(out.get("map_iframe", ""))
@@ -87,35 +251,29 @@ class SiteBuilder:
         out["prod_url"] = ensure_trailing_slash(out.get("prod_url", ""))
 
         # service list
-        out["biz_serv"] = [clean_html(s) for s in out.get("biz_serv", [])]
+        out["biz_serv"] = clean_many(out.get("biz_serv", []))
 
         # default image fallbacks
-        out.setdefault(
-            "custom_hero",
-            out.get("custom_hero")
-            or "https://images.unsplash.com/photo-1519741497674-611481863552?auto=format&fit=crop&q=80&w=1600",
-        )
-        out.setdefault(
-            "custom_feat",
-            out.get("custom_feat")
-            or "https://images.unsplash.com/photo-1511795409834-ef04bbd61622?auto=format&fit=crop&q=80&w=800",
-        )
-        out.setdefault(
-            "custom_gall",
-            out.get("custom_gall")
-            or "https://images.unsplash.com/photo-1532712938310-34cb3982ef74?auto=format&fit=crop&q=80&w=1600",
-        )
+        for k, default in DEFAULT_IMAGES.items():
+            out.setdefault(k, default)
 
         # normalized WA phone (digits only, no leading '+')
         biz_phone = (out.get("biz_phone") or "").strip()
         out["biz_phone_wa"] = re.sub(r"[^\d+]", "", biz_phone).lstrip("+")
 
-        # server-side product parsing (if sheet_url provided)
+        # server-side product parsing (if sheet_url provided); only the first inventory
+        # page is kept in the context, the export streams the rest page by page
         sheet_url = out.get("sheet_url") or ""
+        out["products_page_size"] = self._page_size(out)
         out["products"] = []
+        out["products_more"] = False
+        out["feed_digest"] = ""
         if sheet_url:
             try:
-                out["products"] = self._fetch_products_from_sheet(sheet_url)
+                size = out["products_page_size"]
+                out["feed_digest"], (out["products"], out["products_more"]) = self._with_feed(
+                    sheet_url, lambda meta: self._product_head(sheet_url, meta, size)
+                )
             except Exception:
                 out["products"] = []
 
@@ -123,77 +281,344 @@ class SiteBuilder:
         out["terms_html"] = out.get("terms_body", "")
         out["layout_dna"] = out.get("layout_dna", "Default")
 
-        return out
+        return SanitizedContext(out, digest)
 
-    # --- CSV product fetcher (robust) ---
-    def _fetch_products_from_sheet(self, sheet_url: str):
-        """
-        Fetch CSV from a Google Sheets link or any CSV/pipe-delimited link.
-        Returns a list of product dicts with keys: name, price, desc, img.
-        """
-        url = sheet_url.strip()
-        # Convert Google Sheets edit URL to CSV export link
-        if "docs.google.com/spreadsheets" in url:
-            url = re.sub(r"/edit.*$", "/export?format=csv", url)
+    # --- CSV product fetcher (robust, streaming) ---
+    def _page_size(self, context) -> int:
+        try:
+            return max(1, int(context.get("products_page_size") or self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
 
-        text = _fetch_text(url)
+    def _feeds(self) -> FeedCache:
+        # persistent feed cache (pooled session, ETag/Last-Modified revalidation)
+        return self.feed_cache if self.feed_cache is not None else default_feed_cache()
 
-        # auto-detect delimiter
-        delim = ","
+    def _feed_digest(self, sheet_url: str) -> str:
+        if not sheet_url:
+            return ""
         try:
-            sniffer = csv.Sniffer()
-            dialect = sniffer.sniff(text.splitlines()[0])
-            delim = dialect.delimiter
+            return self._feeds().get_meta(sheet_csv_url(sheet_url))["digest"]
         except Exception:
-            chunk = "\n".join(text.splitlines()[:5])
-            delim = "|" if "|" in chunk and chunk.count("|") >= 1 else ","
+            return ""
 
-        reader = csv.reader(text.splitlines(), delimiter=delim)
-        rows = [r for r in reader if any(cell.strip() for cell in r)]
+    def _with_feed(self, sheet_url: str, parse):
+        """
+        Return ``(digest, parse(meta))`` for the feed's current content. If a refresh or
+        eviction removes that content before it is opened, the metadata is read again, so
+        a result is never paired with the digest of other content.
+        """
+        url = sheet_csv_url(sheet_url)
+        try:
+            meta = self._feeds().get_meta(url)
+            return meta["digest"], parse(meta)
+        except FileNotFoundError:
+            meta = self._feeds().get_meta(url)
+            return meta["digest"], parse(meta)
 
-        start = 0
-        if rows:
-            header = [c.strip().lower() for c in rows[0]]
-            if any(h in ("name", "service_name", "product", "title") for h in header):
-                start = 1
+    def _product_head(self, sheet_url: str, meta: dict, size: int):
+        """
+        Return ``(first_page, has_more)`` for the feed content ``meta`` describes, parsing it
+        only when that content changed.
+        """
+        key = (sheet_url, meta["digest"], size)
+        with self._heads_lock:
+            if key in self._product_heads:
+                self._product_heads.move_to_end(key)
+                return self._product_heads[key]
+        products = self.iter_products_from_sheet(sheet_url, meta)
+        try:
+            head = list(itertools.islice(products, size + 1))
+        finally:
+            products.close()
+        result = (head[:size], len(head) > size)
+        with self._heads_lock:
+            self._product_heads[key] = result
+            while len(self._product_heads) > 16:
+                self._product_heads.popitem(last=False)
+        return result
 
-        products = []
-        for r in rows[start:]:
-            name = r[0].strip() if len(r) > 0 else ""
-            price = r[1].strip() if len(r) > 1 else ""
-            desc = r[2].strip() if len(r) > 2 else ""
-            img = r[3].strip() if len(r) > 3 else ""
-            products.append({"name": name, "price": price, "desc": desc, "img": img})
+    def _product_count(self, sheet_url: str, meta: dict) -> int:
+        """
+        Number of products in the feed content ``meta`` describes, counted in one streaming
+        pass when that content changed.
+        """
+        key = (sheet_url, meta["digest"])
+        with self._heads_lock:
+            if key in self._product_counts:
+                self._product_counts.move_to_end(key)
+                return self._product_counts[key]
+        products = self.iter_products_from_sheet(sheet_url, meta)
+        try:
+            count = sum(1 for _ in products)
+        finally:
+            products.close()
+        with self._heads_lock:
+            self._product_counts[key] = count
+            while len(self._product_counts) > 16:
+                self._product_counts.popitem(last=False)
+        return count
 
-        return products
+    def iter_products_from_sheet(self, sheet_url: str, meta: dict = None):
+        """
+        Stream products from a Google Sheets link or any CSV/pipe-delimited link.
+        Yields Products (name, price, desc, img; price parsed into ``amount``).
+        With ``meta`` (from the feed cache's get_meta), exactly the content it describes is
+        parsed, or FileNotFoundError is raised once that content is no longer cached.
+        """
+        obs = resolve_observer(self.observer)
+        url = sheet_csv_url(sheet_url)
+        pinned = meta is not None
+        with stage("fetch", obs) as info:
+            if not pinned:
+                meta = self._feeds().get_meta(url)
+            info.update(bytes=meta.get("size", 0), cache_hit=meta.get("status") in ("hit", "revalidated", "stale"))
 
-    # --- zip / export ---
-    def build_zip(self, context: dict, output_io: io.BytesIO):
-        ctx = self._sanitize_context(context)
-        with zipfile.ZipFile(output_io, "w", zipfile.ZIP_DEFLATED) as zf:
-            index = self.env.get_template("index.html.j2").render(**ctx)
-            # about and contact templates
+        try:
+            stream = self._feeds().open(url, meta)
+        except FileNotFoundError:
+            if pinned:
+                raise
+            stream = self._feeds().open(url)  # replaced since get_meta: open the current body
+        with stream:
+            products = iter_products(stream)
+            if obs is None:
+                yield from products
+                return
+            # parse time is the time spent inside the parser, excluding the consumer's work
+            count, spent = 0, 0.0
             try:
-                about = self.env.get_template("about.html.j2").render(**ctx)
-            except Exception:
-                about = index
+                while True:
+                    t0 = time.perf_counter()
+                    product = next(products, None)
+                    spent += time.perf_counter() - t0
+                    if product is None:
+                        break
+                    count += 1
+                    yield product
+            finally:
+                obs.on_stage("parse", spent, products=count)
+
+    def _fetch_products_from_sheet(self, sheet_url: str) -> ProductTable:
+        """
+        Fetch CSV from a Google Sheets link or any CSV/pipe-delimited link.
+        Returns the whole catalog as a compact ProductTable (a sequence of Products).
+        """
+        return ProductTable(self.iter_products_from_sheet(sheet_url))
+
+    def _iter_product_pages(self, ctx, used_images: dict = None, catalog: CatalogBuilder = None):
+        """
+        Yield ``(filename, html)`` for each paginated inventory page, one page in memory at a time.
+        With image optimization on, each page's product images are processed as it is rendered
+        and recorded in ``used_images``. With a ``catalog``, its JSON shards are yielded as
+        they fill up and its index at the end. With ``product_pages`` set, each page is
+        followed by the detail pages of its products.
+        """
+        sheet_url = ctx.get("sheet_url") or ""
+        if not sheet_url:
+            return
+        tpl = self.templates.get("products")
+        detail = self.templates.get("product") if _truthy(ctx.get("product_pages")) else None
+        size = ctx["products_page_size"]
+        obs = resolve_observer(self.observer)
+        pages = paginate(self.iter_products_from_sheet(sheet_url), size)
+        try:
+            first = next(pages, None)
+        except Exception:
+            # the feed cannot be fetched or opened: export without inventory pages (as sanitize
+            # does); any failure after the first page is an export error and propagates
+            first = None
+        for number, page, has_next in itertools.chain([first], pages) if first is not None else ():
+            name = f"products/page-{number}.html"
+            if detail is not None:
+                page = self._with_detail_urls(page, (number - 1) * size)
+            images = ctx.get("images") or {}
+            if used_images is not None:
+                images = {**images, **self._process_images((p["img"] for p in page), obs)}
+                used_images.update(images)
+            with stage("render", obs, file=name, products=len(page)) as info, self._scoped(obs):
+                html = tpl.render(
+                    **{
+                        **ctx,
+                        "images": images,
+                        "asset_prefix": "../",
+                        "products": page,
+                        "page_num": number,
+                        "prev_page": f"page-{number - 1}.html" if number > 1 else "",
+                        "next_page": f"page-{number + 1}.html" if has_next else "",
+                    }
+                )
+                if obs is not None:
+                    info["bytes"] = len(html.encode("utf-8"))
+            yield name, html
+            if detail is not None:
+                yield from self._render_details(detail, ctx, page, images, number, obs)
+            if catalog is not None:
+                yield from catalog.add(page, images)
+        if catalog is not None:
+            yield from catalog.finish()
+
+    @staticmethod
+    def _with_detail_urls(products, offset: int = 0) -> list:
+        return [dict(p, url=product_path(offset + i, p.get("name", ""))) for i, p in enumerate(products, 1)]
+
+    def _render_details(self, tpl, ctx, page, images: dict, number: int, obs):
+        """
+        Render the detail pages of one inventory page (reported as a single render stage).
+        """
+        with stage("render", obs, file=f"products/items/ (page {number})", products=len(page)) as info, self._scoped(obs):
+            base = {**ctx, "images": images, "asset_prefix": "../../", "inventory_page": f"../page-{number}.html"}
+            out = [(p["url"], tpl.render(**base, product=p)) for p in page]
+            if obs is not None:
+                info["bytes"] = sum(len(html.encode("utf-8")) for _, html in out)
+        return out
+
+    def _iter_files(self, ctx: SanitizedContext, lastmods: LastmodHistory = None):
+        """
+        Yield ``(filename, content)`` for every file of the exported site, in a fixed order,
+        with sitemap.xml (or its shards and index) built from the pages as they stream past.
+        Sitemap entries get a ``<lastmod>`` only from an explicit ``lastmods`` history.
+        """
+        sitemap = SitemapWriter(ctx.get("prod_url") or "", lastmods)
+        for name, content in self._iter_site_files(ctx):
+            yield name, content
+            if name.endswith(".html") and name not in _UNLISTED:
+                yield from sitemap.add(name, content)
+        yield from sitemap.finish()
+
+    def _iter_site_files(self, ctx: SanitizedContext):
+        obs = resolve_observer(self.observer)
+        extra, stylesheet = {}, None
+        if self.optimize_output:
+            # one shared stylesheet instead of the CSS inlined into every page
+            css = minify_css(self.templates.get("stylesheet").render(**ctx))
+            stylesheet = (hashed_name("assets/site", ".css", css), css)
+            extra["stylesheet"] = stylesheet[0]
+        optimize_images = _truthy(ctx.get("optimize_images"))
+        if optimize_images:
+            sources = [ctx.get("custom_feat"), ctx.get("custom_gall")] + [p["img"] for p in ctx.get("products", ())]
+            extra["images"] = self._process_images(sources, obs)
+        catalog = None
+        if ctx.get("products_more"):
+            # the home page shows the first page; the rest is loaded client-side from JSON, and
+            # the shard layout is embedded so scrolling never needs the (catalog-sized) index
+            size = ctx["products_page_size"]
+            catalog = CatalogBuilder(size)
+            extra["catalog_index"] = CATALOG_INDEX
             try:
-                contact = self.env.get_template("contact.html.j2").render(**ctx)
+                _, count = self._with_feed(ctx["sheet_url"], lambda meta: self._product_count(ctx["sheet_url"], meta))
             except Exception:
-                contact = about
-
-            zf.writestr("index.html", index)
-            zf.writestr("about.html", about)
-            zf.writestr("contact.html", contact)
-            zf.writestr("privacy.html", self._wrap_basic("Privacy Policy", ctx.get("privacy_html", "")))
-            zf.writestr("terms.html", self._wrap_basic("Terms & Conditions", ctx.get("terms_html", "")))
-            zf.writestr("404.html", self._wrap_basic("404 - Not Found", "<h1>404</h1><p>Not Found</p>"))
-            zf.writestr("robots.txt", f"User-agent: *\nAllow: /\nSitemap: {ctx.get('prod_url', '')}sitemap.xml")
-            zf.writestr(
-                "sitemap.xml",
-                f"<?xml version='1.0' encoding='UTF-8'?><urlset xmlns='http://www.sitemaps.org/schemas/sitemap/0.9'><url><loc>{ctx.get('prod_url','')}index.html</loc></url><url><loc>{ctx.get('prod_url','')}about.html</loc></url></urlset>",
+                count = len(ctx["products"])  # as _iter_product_pages: the feed cannot be read
+            extra["catalog"] = {"count": count, "shard_size": size, "shards": -(-count // size)}
+        if _truthy(ctx.get("product_pages")) and ctx.get("products"):
+            extra["products"] = self._with_detail_urls(ctx["products"])
+        if extra:
+            ctx = SanitizedContext({**ctx, **extra}, ctx.digest)
+
+        if stylesheet:
+            yield stylesheet
+        for page in self.pages:
+            yield page.name, self._render(page, ctx)
+        if not optimize_images:
+            yield from self._iter_product_pages(ctx, catalog=catalog)
+            return
+        used = dict(extra["images"])
+        yield from self._iter_product_pages(ctx, used, catalog)
+        for name, path in self._image_pipeline().files(used):
+            with open(path, "rb") as fh:
+                yield name, fh.read()
+
+    def _export_files(self, ctx: SanitizedContext, lastmods: LastmodHistory = None):
+        """
+        Files as written to the export: minified, with precompressed siblings when
+        ``optimize_output`` is on, reporting sizes before/after as the postprocess stage.
+        """
+        if not self.optimize_output:
+            yield from self._iter_files(ctx, lastmods)
+            return
+        obs = resolve_observer(self.observer)
+        for name, content in self._iter_files(ctx, lastmods):
+            with stage("postprocess", obs, file=name) as info:
+                outputs, before = optimize_file(name, content)
+                info.update(
+                    bytes_before=before,
+                    bytes=len(outputs[0][1]),
+                    **{f"{sibling.rsplit('.', 1)[1]}_bytes": len(data) for sibling, data in outputs[1:]},
+                )
+            yield from outputs
+
+    def _image_pipeline(self) -> ImagePipeline:
+        return self.images if self.images is not None else default_image_pipeline()
+
+    def _process_images(self, sources, obs) -> dict:
+        pipeline = self._image_pipeline()
+        with stage("images", obs) as info:
+            before = dict(pipeline.counters)
+            images = pipeline.process(sources)
+            info.update(
+                images=len(images),
+                cache_hit=pipeline.counters["processed"] == before["processed"],
+            )
+        return images
+
+    # --- zip / export ---
+    def iter_zip(self, context: dict, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Stream the exported site as ZIP byte chunks. Files are rendered and compressed as
+        the archive is consumed, so only a few entries are held in memory at a time.
+        """
+        obs = resolve_observer(self.observer)
+        with stage("build", obs) as build:
+            ctx = self._sanitize_context(context)
+            build.update(files=0, bytes=0)
+
+            def on_entry(name, seconds, size, compressed):
+                build["files"] += 1
+                build["bytes"] += compressed
+                if obs is not None:
+                    obs.on_stage("zip_write", seconds, file=name, bytes=size, compressed_bytes=compressed)
+
+            yield from zip_chunks(
+                self._export_files(ctx), workers=self.zip_workers, on_entry=on_entry, chunk_size=chunk_size
             )
 
-    def _wrap_basic(self, title: str, body_html: str) -> str:
+    def build_zip(self, context: dict, output: Union[str, os.PathLike, BinaryIO]) -> int:
+        """
+        Write the exported site ZIP to a binary file object, or atomically to a file path.
+        Returns the archive size in bytes.
+        """
+        return write_chunks(self.iter_zip(context), output)
+
+    def export_artifact(self, context: dict, store: "ArtifactStore" = None) -> Tuple[str, str, bool]:
+        """
+        Export the site ZIP into the shared artifact store (see generator.artifacts) and
+        return ``(key, path, reused)``. An identical site already exported, by any session,
+        is reused without building.
+        """
+        from .artifacts import default_artifact_store
+
+        store = store if store is not None else default_artifact_store()
+        key = self.export_fingerprint(context)
+        path, reused = store.get_or_create(key, lambda fh: self.build_zip(context, fh))
+        return key, path, reused
+
+    def deploy_dir(self, context: dict, path: str, keep_previous: bool = True) -> "DeployResult":
+        """
+        Export the site into directory ``path``, writing only new or changed files and
+        swapping the result in atomically (see generator.deploy). The sitemap's lastmod
+        history lives in the deploy manifest, so it belongs to this directory's site.
+        """
+        from .deploy import deploy_files, read_manifest
+
+        obs = resolve_observer(self.observer)
+        with stage("build", obs) as build:
+            lastmods = LastmodHistory(read_manifest(path).get("lastmod"))
+            files = self._export_files(self._sanitize_context(context), lastmods)
+            result = deploy_files(files, path, keep_previous, extra={"lastmod": lastmods.current})
+            build.update(files=result.unchanged + len(result.added) + len(result.changed), bytes=result.bytes_written)
+        return result
+
+    def _wrap_basic(self, title: str, body_html: str, stylesheet: str = None) -> str:
         body_safe = clean_html(body_html or "")
-        return f"<!doctype html><html><head><meta charset='utf-8'><title>{title}</title></head><body><main><h1>{title}</h1><div>{body_safe}</div></main></body></html>"
+        link = f"<link rel='stylesheet' href='{stylesheet}'>" if stylesheet else ""
+        return f"<!doctype html><html><head><meta charset='utf-8'><title>{title}</title>{link}</head><body><main><h1>{title}</h1><div>{body_safe}</div></main></body></html>"
@@ -0,0 +1,112 @@
+"""
+Streaming sitemap for exports.
+
+URLs are added as their pages are produced and written out at most MAX_URLS per file, so
+only the current shard is held in memory. A site that fits in one file gets a plain
+``sitemap.xml``; larger ones get ``sitemap-1.xml``, ``sitemap-2.xml``, ... and a
+``sitemap.xml`` sitemap index, so robots.txt always points at the same file.
+
+``<lastmod>`` is only written when a LastmodHistory is passed: it keeps each page's content
+hash and the day it last changed, so re-publishing an unchanged page keeps its date.
+SiteBuilder.deploy_dir carries that history in the deploy manifest of the target directory;
+ZIP exports have no history, so the same inputs always give the same archive.
+"""
+import datetime
+import hashlib
+from html import escape
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+MAX_URLS = 50000
+SITEMAP = "sitemap.xml"
+
+_XML_HEAD = "<?xml version='1.0' encoding='UTF-8'?>\n"
+_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+def shard_name(number: int) -> str:
+    return f"sitemap-{number}.xml"
+
+
+def content_hash(content: Union[str, bytes]) -> str:
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+class LastmodHistory:
+    """
+    One site's ``{path: [content hash, day it last changed]}``: read from the previous
+    publish (``previous``) and recorded for the next one (``current``).
+    """
+
+    def __init__(self, previous: Optional[Mapping] = None, today: Optional[str] = None):
+        self.previous = dict(previous or {})
+        self.today = today
+        self.current: Dict[str, List[str]] = {}
+
+    def lastmods(self, entries: Sequence[Tuple[str, str]]) -> List[str]:
+        """
+        Return the lastmod day for each ``(path, content_hash)``: the previous day when the
+        hash is unchanged, otherwise ``today``.
+        """
+        today = self.today or datetime.date.today().isoformat()
+        out = []
+        for path, digest in entries:
+            before = self.previous.get(path)
+            day = before[1] if before and before[0] == digest else today
+            self.current[path] = [digest, day]
+            out.append(day)
+        return out
+
+
+class SitemapWriter:
+    """
+    Collects ``(path, content)`` pages and yields ``(filename, xml)`` sitemap files:
+    each full shard from ``add`` and the rest (plus the index, if sharded) from ``finish``.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        history: Optional[LastmodHistory] = None,
+        max_urls: int = MAX_URLS,
+    ):
+        self.base_url = base_url
+        self.history = history
+        self.max_urls = max(1, max_urls)
+        self.count = 0
+        self._pending: List[Tuple[str, str]] = []
+        self._shards: List[Optional[str]] = []  # newest lastmod of each written shard
+
+    def add(self, path: str, content: Union[str, bytes]) -> Iterator[Tuple[str, str]]:
+        self._pending.append((path, content_hash(content)))
+        self.count += 1
+        if len(self._pending) >= self.max_urls:
+            yield self._flush()
+
+    def _flush(self) -> Tuple[str, str]:
+        rows, self._pending = self._pending, []
+        if self.history is not None:
+            days = self.history.lastmods(rows)
+        else:
+            days = [None] * len(rows)
+        self._shards.append(max(filter(None, days), default=None))
+        body = "".join(
+            f"<url><loc>{escape(self.base_url + path, quote=False)}</loc>" + (f"<lastmod>{day}</lastmod>" if day else "") + "</url>"
+            for (path, _), day in zip(rows, days)
+        )
+        return shard_name(len(self._shards)), f"{_XML_HEAD}<urlset xmlns='{_NS}'>{body}</urlset>"
+
+    def finish(self) -> Iterator[Tuple[str, str]]:
+        if not self._shards:
+            yield SITEMAP, self._flush()[1]
+            return
+        if self._pending:
+            yield self._flush()
+        body = "".join(
+            f"<sitemap><loc>{escape(self.base_url + shard_name(n), quote=False)}</loc>"
+            + (f"<lastmod>{day}</lastmod>" if day else "")
+            + "</sitemap>"
+            for n, day in enumerate(self._shards, 1)
+        )
+        yield SITEMAP, f"{_XML_HEAD}<sitemapindex xmlns='{_NS}'>{body}</sitemapindex>"
+
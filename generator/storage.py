@@ -0,0 +1,50 @@
+"""
+On-disk helpers shared by the caches and stores: where each one lives by default, and
+atomic file writes.
+
+Every cache directory is ``~/.cache/titan/<name>`` unless its environment variable
+(TITAN_FEED_CACHE_DIR, TITAN_IMAGE_CACHE_DIR, TITAN_TEMPLATE_CACHE_DIR,
+TITAN_ARTIFACT_DIR) says otherwise. Files are written to a temp file in the target's
+directory and renamed into place, so readers see the old file or the new one, never a
+partial write.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterator, Optional, Union
+
+
+def default_cache_dir(env: str, name: str) -> str:
+    """
+    Directory named by environment variable ``env``, else ``~/.cache/titan/<name>``.
+    """
+    return os.environ.get(env) or os.path.join(os.path.expanduser("~"), ".cache", "titan", name)
+
+
+@contextmanager
+def atomic_file(
+    path: Union[str, Callable[[], str]], prefix: str = ".tmp-", dir: Optional[str] = None
+) -> Iterator[BinaryIO]:
+    """
+    Yield a binary file that replaces ``path`` when the block exits cleanly; on error the
+    temp file is removed and ``path`` is left as it was. ``path`` may be a callable returning
+    the name once the content is written (e.g. a content digest); pass ``dir`` with it.
+    """
+    directory = dir if dir is not None else os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=prefix)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            yield fh
+        os.replace(tmp, path() if callable(path) else path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def atomic_write(path: str, data: bytes):
+    """
+    Write ``data`` to ``path`` atomically (see atomic_file).
+    """
+    with atomic_file(path) as fh:
+        fh.write(data)
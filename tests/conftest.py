@@ -0,0 +1,27 @@
+import pytest
+
+from benchmarks.sheet_server import SheetServer
+from generator import artifacts, feeds
+
+
+@pytest.fixture
+def sheet_server():
+    """Local stand-in for a published sheet: set ``server.feeds[path] = csv_text``."""
+    with SheetServer() as srv:
+        yield srv
+
+
+@pytest.fixture(autouse=True)
+def feed_cache(tmp_path, monkeypatch):
+    """Isolate every test from the user's on-disk feed cache."""
+    cache = feeds.FeedCache(cache_dir=str(tmp_path / "feeds"), ttl=60)
+    monkeypatch.setattr(feeds, "_default_cache", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def artifact_store(tmp_path, monkeypatch):
+    """Isolate every test from the user's export artifact store."""
+    store = artifacts.ArtifactStore(str(tmp_path / "artifacts"))
+    monkeypatch.setattr(artifacts, "_default_store", store)
+    return store
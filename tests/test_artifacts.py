@@ -0,0 +1,92 @@
+import os
+import threading
+import time
+import zipfile
+
+import pytest
+
+from generator.artifacts import ArtifactStore
+from generator.context import ContextCache
+from generator.site_builder import SiteBuilder
+
+
+def _key(n):
+    return f"{n:064x}"
+
+
+def test_identical_exports_share_one_artifact(artifact_store):
+    ctx = {"biz_name": "Acme", "about_txt": "Plain story"}
+    # two sessions: separate builders, one store
+    first = SiteBuilder(context_cache=ContextCache()).export_artifact(ctx)
+    second = SiteBuilder(context_cache=ContextCache()).export_artifact(dict(ctx, biz_hours="Mon-Fri"))
+    assert first[2] is False and second[2] is True
+    assert first[:2] == second[:2]  # biz_hours is read by no exported file
+    with zipfile.ZipFile(first[1]) as zf:
+        assert "index.html" in zf.namelist()
+
+    edited = SiteBuilder(context_cache=ContextCache()).export_artifact(dict(ctx, biz_name="Other"))
+    assert edited[0] != first[0] and edited[2] is False
+    assert b"".join(artifact_store.iter_chunks(edited[0], chunk_size=1024)) == open(edited[1], "rb").read()
+    assert artifact_store.stats()["entries"] == 2
+
+
+def test_concurrent_requests_build_once(tmp_path):
+    store = ArtifactStore(str(tmp_path / "store"))
+    builds = []
+    start = threading.Barrier(4)
+
+    def write(fh):
+        builds.append(1)
+        time.sleep(0.05)
+        fh.write(b"zip")
+
+    def request():
+        start.wait()
+        store.get_or_create(_key(1), write)
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(builds) == 1
+    assert store.stats() == {"hits": 3, "misses": 1, "evicted": 0, "entries": 1, "bytes": 3}
+
+    # a failed build leaves nothing behind
+    def broken(fh):
+        fh.write(b"partial")
+        raise RuntimeError("export failed")
+
+    with pytest.raises(RuntimeError):
+        store.get_or_create(_key(2), broken)
+    assert store.get(_key(2)) is None and os.listdir(store.root) == [_key(1) + ".zip"]
+
+
+def test_eviction_by_age_and_size(tmp_path):
+    store = ArtifactStore(str(tmp_path / "store"), max_bytes=250, max_age=3600)
+    now = time.time()
+    for n in range(3):
+        store.get_or_create(_key(n), lambda fh: fh.write(b"x" * 100))
+        # oldest first: key 0 was used longest ago
+        os.utime(store.path(_key(n)), (now - 100 + n, now - 100 + n))
+    assert store.get(_key(2)) is not None
+    assert store.get(_key(0)) is None  # pushed out when key 2 exceeded 250 bytes
+    assert store.get(_key(1)) is not None
+
+    os.utime(store.path(_key(1)), (now - 7200, now - 7200))
+    store.get_or_create(_key(3), lambda fh: fh.write(b"y"))
+    assert store.get(_key(1)) is None  # unused for longer than max_age
+    assert store.stats()["evicted"] == 2
+
+    with pytest.raises(ValueError):
+        store.path("../etc/passwd")
+
+
+def test_export_format_version_changes_the_key(artifact_store, monkeypatch):
+    from generator import site_builder
+
+    ctx = {"biz_name": "Acme"}
+    before = SiteBuilder(context_cache=ContextCache()).export_artifact(ctx)
+    monkeypatch.setattr(site_builder, "_EXPORT_FORMAT_VERSION", site_builder._EXPORT_FORMAT_VERSION + "-next")
+    after = SiteBuilder(context_cache=ContextCache()).export_artifact(ctx)
+    assert after[0] != before[0] and after[2] is False
@@ -0,0 +1,75 @@
+import io
+import zipfile
+
+from PIL import Image
+
+from generator.assets import ImagePipeline
+from generator.context import ContextCache
+from generator.incremental import RenderCache
+from generator.site_builder import SiteBuilder
+
+
+def test_export_bundles_responsive_variants_and_caches_them(tmp_path, sheet_server):
+    src = tmp_path / "src"
+    src.mkdir()
+    Image.new("RGB", (2000, 1000), (200, 40, 40)).save(src / "gall.png")
+    Image.new("RGB", (800, 800), (40, 200, 40)).save(src / "rose.jpg")
+    (src / "copy.jpg").write_bytes((src / "rose.jpg").read_bytes())
+    sheet_server.feeds["/s.csv"] = "name,price,desc,img\nRose,1,,https://cdn.example/rose.jpg\nCopy,2,,copy.jpg\n"
+
+    pipeline = ImagePipeline(cache_dir=str(tmp_path / "cache"), source_dir=str(src), workers=2)
+    builder = SiteBuilder(context_cache=ContextCache(), render_cache=RenderCache(), images=pipeline)
+    ctx = {"biz_name": "Test Co", "custom_gall": "gall.png", "sheet_url": sheet_server.url("/s.csv"), "optimize_images": True}
+
+    buf = io.BytesIO()
+    builder.build_zip(ctx, buf)
+    with zipfile.ZipFile(buf) as zf:
+        assets = [n for n in zf.namelist() if n.startswith("assets/img/")]
+        about = zf.read("about.html").decode("utf-8")
+        page = zf.read("products/page-1.html").decode("utf-8")
+    # gallery at 480/960/1600 + one deduplicated product image at 480/800, each as webp and jpg
+    assert len(assets) == 10
+    assert 'type="image/webp"' in about and 'width="1600" height="800"' in about and 'loading="lazy"' in about
+    assert 'src="../assets/img/' in page
+    assert pipeline.counters["processed"] == 2
+
+    builder.render_cache.clear()
+    builder.build_zip(ctx, io.BytesIO())
+    assert pipeline.counters["processed"] == 2 and pipeline.counters["cached"] >= 2
+
+
+def test_local_sources_stay_inside_the_source_dir(tmp_path):
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    Image.new("RGB", (600, 400)).save(src / "sub" / "ok.jpg")
+    Image.new("RGB", (600, 400)).save(tmp_path / "private.jpg")
+    pipeline = ImagePipeline(cache_dir=str(tmp_path / "cache"), source_dir=str(src / "sub"), workers=1)
+
+    outside = [str(tmp_path / "private.jpg"), "../private.jpg", "ok.jpg/../../private.jpg"]
+    assert [pipeline._local_source(u) for u in outside] == [None, None, None]
+    assert pipeline.process(outside) == {} and pipeline.counters["failed"] == 3
+    assert set(pipeline.process(["ok.jpg", "https://cdn.example/img/ok.jpg"])) == {"ok.jpg", "https://cdn.example/img/ok.jpg"}
+
+
+def test_one_process_pool_serves_every_inventory_page(tmp_path, sheet_server, monkeypatch):
+    from concurrent import futures
+
+    src = tmp_path / "src"
+    src.mkdir()
+    rows = []
+    for i in range(6):
+        Image.new("RGB", (500, 300), (i * 40, 10, 10)).save(src / f"p{i}.jpg")
+        rows.append(f"Item {i},{i},,p{i}.jpg\n")
+    sheet_server.feeds["/s.csv"] = "name,price,desc,img\n" + "".join(rows)
+    created = []
+    pool_class = futures.ProcessPoolExecutor
+    monkeypatch.setattr(futures, "ProcessPoolExecutor", lambda *a, **kw: created.append(1) or pool_class(*a, **kw))
+
+    pipeline = ImagePipeline(cache_dir=str(tmp_path / "cache"), source_dir=str(src), workers=2)
+    builder = SiteBuilder(context_cache=ContextCache(), render_cache=RenderCache(), images=pipeline, page_size=2)
+    try:
+        builder.build_zip({"biz_name": "Test Co", "sheet_url": sheet_server.url("/s.csv"), "optimize_images": True}, io.BytesIO())
+    finally:
+        pipeline.close()
+    # three inventory pages of two new images each, one pool
+    assert pipeline.counters["processed"] == 6 and created == [1]
@@ -0,0 +1,38 @@
+import json
+import zipfile
+
+from generator.batch import build_batch, load_manifest
+
+
+def _ctx(name):
+    return {"biz_name": name, "hero_h": "Hello", "biz_serv": ["One", "Two"], "prod_url": "https://example.com/"}
+
+
+def test_build_batch_writes_one_zip_per_site(tmp_path):
+    report = build_batch([_ctx("Alpha Co"), _ctx("Beta Co"), _ctx("Alpha Co")], str(tmp_path), workers=2)
+    assert report.succeeded == 3 and report.failed == 0
+    paths = sorted(r.path for r in report.results)
+    assert len(set(paths)) == 3
+    for p in paths:
+        with zipfile.ZipFile(p) as zf:
+            assert "index.html" in zf.namelist()
+
+
+def test_load_manifest_splits_list_fields(tmp_path):
+    csv_path = tmp_path / "m.csv"
+    csv_path.write_text('biz_name,biz_serv,area_list\nTest Co,"A\nB","X, Y"\n', encoding="utf-8")
+    jsonl_path = tmp_path / "m.jsonl"
+    jsonl_path.write_text(json.dumps(_ctx("Test Co")) + "\n\n", encoding="utf-8")
+    (row,) = load_manifest(str(csv_path))
+    assert row["biz_serv"] == ["A", "B"] and row["area_list"] == ["X", "Y"]
+    (row,) = load_manifest(str(jsonl_path))
+    assert row["biz_serv"] == ["One", "Two"]
+
+
+def test_batch_report_includes_fragment_reuse(tmp_path):
+    # same chrome, different content: the second site re-renders its pages but not the chrome
+    sites = [dict(_ctx("Gamma Co"), about_txt="<p>One</p>"), dict(_ctx("Gamma Co"), about_txt="<p>Two</p>")]
+    report = build_batch(sites, str(tmp_path), workers=1)
+    assert all(r.fragment_hits > 0 for r in report.results)
+    assert report.results[1].fragment_misses == 0
+    assert 0 < report.to_dict()["fragment_hit_rate"] <= 1
@@ -0,0 +1,34 @@
+from benchmarks import loadtest
+from benchmarks.run import compare, run
+
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    base = {"results": {"a": {"median": 1.0}, "b": {"median": 1.0}}}
+    current = {"results": {"a": {"median": 1.2}, "b": {"median": 1.5}, "new": {"median": 9.0}}}
+    (line,) = compare(current, base, threshold=0.25)
+    assert line.startswith("b:")
+
+
+def test_run_single_case_offline():
+    result = run(repeat=1, quick=True, pattern="fetch_products[pipe")
+    assert list(result["results"]) == ["fetch_products[pipe-1000]"]
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert loadtest.percentile(values, 50) == 50.0
+    assert loadtest.percentile(values, 99) == 99.0
+    assert loadtest.percentile([3.0], 95) == 3.0
+    assert loadtest.percentile([], 50) == 0.0
+
+
+def test_loadtest_reports_every_operation():
+    report = loadtest.run(sessions=3, iterations=1, rows=60, sheets=2, quiet=True)
+    ops = report["ops"]
+    assert list(ops) == list(loadtest.OPS)
+    assert ops["preview"]["count"] == 3 * len(loadtest.PREVIEW_PAGES) * len(loadtest.DEVICES)
+    assert all(r["count"] == 3 for name, r in ops.items() if name != "preview")
+    assert all(r["errors"] == 0 and r["p50"] <= r["p95"] <= r["p99"] <= r["max"] for r in ops.values())
+    assert report["throughput"]["rounds_per_second"] > 0
+    # sessions sharing a sheet fetch it once between them
+    assert report["feeds"]["sheet_requests"] <= 2 * 2
@@ -23,3 +23,12 @@ def test_render_contains_business_name():
     html = builder.render_home(ctx, is_home=True)
     assert "Test Co" in html
     assert "Hello" in html
+
+
+def test_legal_text_is_linked_not_embedded():
+    sb = SiteBuilder()
+    long_text = "<p>Clause</p>" * 2000
+    html = sb.render_home({"biz_name": "Test Co", "priv_body": long_text, "terms_body": long_text})
+    assert "Clause" not in html
+    assert 'href="privacy.html"' in html and 'href="terms.html"' in html
+    assert "Clause" in sb.render_page("privacy.html", {"priv_body": long_text})
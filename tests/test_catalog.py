@@ -0,0 +1,53 @@
+import io
+import json
+import zipfile
+
+from generator.catalog import CATALOG_INDEX, CatalogBuilder, price_value
+from generator.context import ContextCache
+from generator.site_builder import SiteBuilder
+
+
+def test_builder_shards_as_it_goes_and_indexes_terms_and_prices():
+    catalog = CatalogBuilder(shard_size=2)
+    products = [
+        {"name": "Red Rose", "price": "₹1,200", "desc": "Fresh", "img": "a.jpg"},
+        {"name": "Lily", "price": "₹90", "desc": "White rose-like", "img": "b.jpg"},
+        {"name": "Orchid", "price": "on request", "desc": "", "img": "c.jpg"},
+    ]
+    assert [name for name, _ in catalog.add(products[:2])] == ["products/data-1.json"]
+    files = dict(catalog.add(products[2:], images={"c.jpg": {"src": "assets/img/c-480.jpg"}}))
+    files.update(catalog.finish())
+    assert json.loads(files["products/data-2.json"]) == [["Orchid", "on request", "", "assets/img/c-480.jpg"]]
+    index = json.loads(files[CATALOG_INDEX])
+    assert index["count"] == 3 and index["shards"] == 2
+    assert index["terms"]["rose"] == [0, 1]
+    assert index["by_price"] == [1, 0, 2]
+    assert price_value("$ 19.99") == 19.99 and price_value("") is None
+
+
+def test_home_page_stays_small_and_links_the_catalog(sheet_server):
+    sheet_server.feeds["/big.csv"] = "name,price\n" + "".join(f"Item {i},{i}\n" for i in range(25))
+    builder = SiteBuilder(context_cache=ContextCache(), page_size=10)
+    buf = io.BytesIO()
+    builder.build_zip({"biz_name": "Test Co", "sheet_url": sheet_server.url("/big.csv")}, buf)
+    with zipfile.ZipFile(buf) as zf:
+        names = zf.namelist()
+        index = zf.read("index.html").decode("utf-8")
+        catalog = json.loads(zf.read(CATALOG_INDEX))
+    assert [n for n in names if n.startswith("products/data-") and n.endswith(".json")] == [
+        "products/data-1.json",
+        "products/data-2.json",
+        "products/data-3.json",
+    ]
+    assert catalog["count"] == 25
+    assert index.count('class="product-card card"') == 10
+    assert CATALOG_INDEX in index and "Item 24" not in index
+    # scrolling needs only the shard layout embedded in the page, never the index
+    assert 'data-count="25" data-shard-size="10" data-shards="3"' in index
+
+    # no catalog when everything fits on the home page
+    buf = io.BytesIO()
+    builder.build_zip({"biz_name": "Test Co"}, buf)
+    with zipfile.ZipFile(buf) as zf:
+        assert CATALOG_INDEX not in zf.namelist()
+        assert "catalog-q" not in zf.read("index.html").decode("utf-8")
@@ -0,0 +1,28 @@
+import pytest
+
+from generator.context import ContextCache, SanitizedContext
+from generator.site_builder import SiteBuilder
+
+
+def test_sanitize_is_memoized_and_immutable():
+    builder = SiteBuilder(context_cache=ContextCache(maxsize=2))
+    ctx = {"biz_name": "<b>Test Co</b><script>x</script>", "biz_serv": ["One"]}
+    a = builder._sanitize_context(ctx)
+    b = builder._sanitize_context(dict(ctx))
+    assert a is b
+    assert isinstance(a, SanitizedContext)
+    assert "<script>" not in a["biz_name"]
+    assert a["biz_serv"] == ("One",)
+    with pytest.raises(TypeError):
+        a["biz_name"] = "x"
+    builder.render_home(ctx)
+    builder.render_about(ctx)
+    assert builder.context_cache.stats()["misses"] == 1
+
+
+def test_context_cache_evicts_least_recently_used():
+    cache = ContextCache(maxsize=2)
+    builder = SiteBuilder(context_cache=cache)
+    for name in ("A", "B", "C"):
+        builder._sanitize_context({"biz_name": name})
+    assert cache.stats()["size"] == 2 and cache.stats()["evictions"] == 1
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from generator.batch import build_batch
+from generator.context import ContextCache
+from generator.deploy import deploy_files, read_manifest
+from generator.site_builder import SiteBuilder
+
+
+def _tree(path):
+    out = {}
+    for root, _, names in os.walk(path):
+        for name in names:
+            full = os.path.join(root, name)
+            with open(full, "rb") as fh:
+                out[os.path.relpath(full, path).replace(os.sep, "/")] = fh.read()
+    return out
+
+
+def test_only_changed_files_are_written_and_orphans_removed(tmp_path):
+    site = str(tmp_path / "site")
+    first = deploy_files([("index.html", "home"), ("about.html", "about"), ("assets/a.css", b"a")], site)
+    assert first.release == 1 and sorted(first.added) == ["about.html", "assets/a.css", "index.html"]
+    assert _tree(site) == {"index.html": b"home", "about.html": b"about", "assets/a.css": b"a"}
+
+    second = deploy_files([("index.html", "home v2"), ("assets/a.css", b"a"), ("new.html", "new")], site)
+    assert (second.added, second.changed, second.removed, second.unchanged) == (["new.html"], ["index.html"], ["about.html"], 1)
+    assert second.bytes_written == len("home v2") + len("new")
+    assert _tree(site) == {"index.html": b"home v2", "assets/a.css": b"a", "new.html": b"new"}
+    # unchanged files are hard links into the previous release, which is kept for rollback
+    live = os.path.realpath(site)
+    assert os.stat(os.path.join(live, "assets", "a.css")).st_nlink == 2
+    manifest = read_manifest(site)
+    assert manifest["release"] == 2 and manifest["removed"] == ["about.html"]
+    assert set(manifest["files"]) == {"index.html", "assets/a.css", "new.html"}
+
+    # an unchanged build writes nothing and keeps the live release
+    third = deploy_files([("index.html", "home v2"), ("assets/a.css", b"a"), ("new.html", "new")], site)
+    assert not third.swapped and third.release == 2 and os.path.realpath(site) == live
+    assert sorted(os.listdir(site + ".releases")) == ["000001", "000002"]
+
+    deploy_files([("index.html", "home v3")], site)
+    assert sorted(os.listdir(site + ".releases")) == ["000002", "000003"]
+
+
+def test_refuses_to_replace_a_plain_directory(tmp_path):
+    (tmp_path / "site").mkdir()
+    with pytest.raises(FileExistsError):
+        deploy_files([("index.html", "x")], str(tmp_path / "site"))
+
+
+def test_builder_and_batch_deploy_only_the_delta(tmp_path):
+    builder = SiteBuilder(context_cache=ContextCache())
+    ctx = {"biz_name": "Delta Co", "priv_body": "v1"}
+    first = builder.deploy_dir(ctx, str(tmp_path / "delta"))
+    assert "index.html" in first.added and "sitemap.xml" in first.added
+    second = builder.deploy_dir(dict(ctx, priv_body="v2"), str(tmp_path / "delta"))
+    # only the edited page (and, across midnight, the sitemap's lastmod) changes
+    assert "privacy.html" in second.changed and not second.added and not second.removed
+    assert set(second.changed) <= {"privacy.html", "sitemap.xml", "sitemap.xml.gz"}
+
+    report = build_batch([{"biz_name": "Dir Co"}], str(tmp_path / "out"), workers=1, fmt="dir")
+    result = report.results[0]
+    assert result.ok and result.path.endswith("dir_co_final") and result.files_changed > 0
+    assert "index.html" in read_manifest(result.path)["files"]
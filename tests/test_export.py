@@ -0,0 +1,49 @@
+import io
+import zipfile
+
+from generator.context import ContextCache
+from generator.export import write_zip, zip_chunks
+from generator.incremental import RenderCache
+from generator.site_builder import SiteBuilder
+
+
+def _builder(**kwargs):
+    return SiteBuilder(context_cache=ContextCache(), render_cache=RenderCache(), **kwargs)
+
+
+def test_exports_are_byte_identical_and_match_the_streamed_chunks(tmp_path):
+    ctx = {"biz_name": "Test Co", "about_txt": "<p>About</p>" * 200}
+    first, second = io.BytesIO(), io.BytesIO()
+    _builder().build_zip(ctx, first)
+    _builder(zip_workers=1).build_zip(ctx, second)
+    assert first.getvalue() == second.getvalue()
+
+    chunks = list(_builder().iter_zip(ctx, chunk_size=1024))
+    assert max(map(len, chunks)) <= 1024
+    assert b"".join(chunks) == first.getvalue()
+
+    path = tmp_path / "site.zip"
+    assert _builder().build_zip(ctx, str(path)) == path.stat().st_size
+    assert path.read_bytes() == first.getvalue()
+    assert not list(tmp_path.glob("site.zip.part*"))  # no temp file left
+
+
+def test_archive_is_readable_with_stored_and_deflated_entries():
+    files = [("index.html", "<p>hi</p>" * 100), ("a.webp", b"\x00" * 50), ("ünï.txt", "x")]
+    buf = io.BytesIO()
+    write_zip(files, buf, workers=2)
+    with zipfile.ZipFile(buf) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ["index.html", "a.webp", "ünï.txt"]
+        assert zf.getinfo("a.webp").compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo("index.html").compress_type == zipfile.ZIP_DEFLATED
+        assert zf.getinfo("index.html").date_time == (1980, 1, 1, 0, 0, 0)
+        assert zf.read("ünï.txt") == b"x"
+
+
+def test_zip64_directory_for_many_entries():
+    count = 70000
+    data = b"".join(zip_chunks(((f"f{i}.txt", b"") for i in range(count)), workers=1))
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        names = zf.namelist()
+    assert len(names) == count and names[-1] == f"f{count - 1}.txt"
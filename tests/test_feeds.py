@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from generator.feeds import FeedCache
+
+
+def test_feed_cache_hits_then_revalidates_with_etag(tmp_path, sheet_server):
+    sheet_server.feeds["/sheet.csv"] = "name,price\nRose,₹10\n"
+    url = sheet_server.url("/sheet.csv")
+    cache = FeedCache(cache_dir=str(tmp_path), ttl=60)
+    assert "₹10" in cache.get_text(url)
+    assert "₹10" in cache.get_text(url)
+    assert sheet_server.requests == 1
+
+    cache.ttl = 0
+    assert "₹10" in cache.get_text(url)  # unchanged -> 304
+    sheet_server.feeds["/sheet.csv"] = "name,price\nLily,₹20\n"
+    assert "Lily" in cache.get_text(url)
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 1,
+        "revalidated": 1,
+        "refreshed": 1,
+        "stale": 0,
+        "errors": 0,
+        "coalesced": 0,
+        "background": 0,
+    }
+
+    # a fresh instance (new process / restart) reuses the on-disk copy
+    assert "Lily" in FeedCache(cache_dir=str(tmp_path), ttl=60).get_text(url)
+    assert sheet_server.requests == 3
+
+
+def test_feed_cache_serves_stale_on_error_and_prunes(tmp_path, sheet_server):
+    sheet_server.feeds["/a.csv"] = "a\n"
+    sheet_server.feeds["/b.csv"] = "b\n"
+    cache = FeedCache(cache_dir=str(tmp_path), ttl=0, max_entries=1)
+    cache.get_text(sheet_server.url("/a.csv"))
+    del sheet_server.feeds["/a.csv"]
+    assert cache.get_text(sheet_server.url("/a.csv")) == "a\n"
+    assert cache.stats()["stale"] == 1
+    cache.get_text(sheet_server.url("/b.csv"))
+    assert len(list(tmp_path.glob("*.body"))) == 1
+    with pytest.raises(requests.HTTPError):
+        cache.get_text(sheet_server.url("/a.csv"))
+
+
+def test_concurrent_fetches_of_one_feed_share_a_request(tmp_path, sheet_server):
+    sheet_server.feeds["/slow.csv"] = "name\nRose\n"
+    sheet_server.latency = 0.3
+    cache = FeedCache(cache_dir=str(tmp_path), ttl=60)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def fetch():
+        barrier.wait()
+        results.append(cache.get_meta(sheet_server.url("/slow.csv"))["digest"])
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(results)) == 1 and len(results) == 8
+    assert sheet_server.requests == 1
+    assert cache.stats()["coalesced"] == 7
+
+
+def test_expired_feed_is_served_at_once_and_refreshed_in_background(tmp_path, sheet_server):
+    sheet_server.feeds["/swr.csv"] = "name\nRose\n"
+    url = sheet_server.url("/swr.csv")
+    cache = FeedCache(cache_dir=str(tmp_path), ttl=0, background=True)
+    assert cache.get_meta(url)["status"] == "miss"  # never seen: the only blocking fetch
+
+    sheet_server.feeds["/swr.csv"] = "name\nLily\n"
+    sheet_server.latency = 0.5
+    t0 = time.perf_counter()
+    meta = cache.get_meta(url)
+    assert meta["status"] == "stale" and time.perf_counter() - t0 < 0.25  # not waiting on the network
+    assert cache.get_text(url) == "name\nRose\n"
+    assert cache.wait_refreshes(timeout=10)
+    sheet_server.latency = 0
+    assert "Lily" in cache.get_text(url)
+    assert cache.stats()["background"] >= 1 and cache.stats()["refreshed"] >= 1
+    cache.close()
+
+
+def test_requests_per_host_are_limited(tmp_path, sheet_server):
+    for name in "abc":
+        sheet_server.feeds[f"/{name}.csv"] = f"{name}\n"
+    sheet_server.latency = 0.2
+    cache = FeedCache(cache_dir=str(tmp_path), ttl=60, max_per_host=1)
+    threads = [threading.Thread(target=cache.get_meta, args=(sheet_server.url(f"/{n}.csv"),)) for n in "abc"]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert time.perf_counter() - t0 >= 0.6 and cache.stats()["misses"] == 3
+
+
+def test_opened_body_matches_its_metadata(tmp_path, sheet_server):
+    sheet_server.feeds["/live.csv"] = "name\nRose\n"
+    url = sheet_server.url("/live.csv")
+    cache = FeedCache(cache_dir=str(tmp_path), ttl=0)
+    old = cache.get_meta(url)
+    with cache.open(url, old) as stream:
+        sheet_server.feeds["/live.csv"] = "name\nTulip\n"
+        assert cache.get_meta(url)["status"] == "refreshed"
+        assert stream.read() == "name\nRose\n"  # the content ``old`` describes
+    with pytest.raises(FileNotFoundError):
+        cache.open(url, old)
+    assert cache.get_text(url) == "name\nTulip\n"
+    assert len(list(tmp_path.glob("*.body"))) == 1
+
+
+def test_builder_never_pairs_products_with_another_feed_digest(tmp_path, sheet_server):
+    from generator.context import ContextCache
+    from generator.site_builder import SiteBuilder
+
+    sheet_server.feeds["/race.csv"] = "name,price\nRose,1\n"
+    url = sheet_server.url("/race.csv")
+
+    class Racing(FeedCache):
+        raced = False
+
+        def get_meta(self, url):
+            meta = super().get_meta(url)
+            if not self.raced:
+                # a refresh lands between get_meta and open
+                self.raced = True
+                sheet_server.feeds["/race.csv"] = "name,price\nTulip,2\n"
+                super().get_meta(url)
+            return meta
+
+    feeds = Racing(cache_dir=str(tmp_path), ttl=0)
+    ctx = SiteBuilder(context_cache=ContextCache(), feed_cache=feeds)._sanitize_context({"sheet_url": url})
+    assert [p["name"] for p in ctx["products"]] == ["Tulip"]
+    assert ctx["feed_digest"] == feeds.get_meta(url)["digest"]
@@ -0,0 +1,61 @@
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# loaded on first use only (sheet fetch, markup cleaning, image optimization, export, deploy)
+HEAVY = ("requests", "urllib3", "http.client", "bleach", "html5lib", "PIL", "sqlite3", "zipfile", "concurrent.futures")
+
+# cumulative -X importtime of generator.site_builder, jinja2 included (~65 ms here)
+BUDGET_US = 150_000
+
+
+def _importtime(code):
+    """
+    Run ``code`` in a fresh interpreter; return ``{module: cumulative_us}`` for every
+    module it imported beyond what a bare interpreter (site, .pth hooks) already loads.
+    """
+
+    def run(src):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", src],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        out = {}
+        for line in proc.stderr.splitlines():
+            m = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)", line)
+            if m:
+                out[m.group(2)] = int(m.group(1))
+        return out
+
+    baseline = run("pass")
+    return {name: us for name, us in run(code).items() if name not in baseline}
+
+
+def test_package_import_loads_nothing():
+    loaded = _importtime("import generator")
+    assert [m for m in loaded if m.startswith("generator.")] == []
+    assert "jinja2" not in loaded
+
+
+def test_site_builder_defers_heavy_dependencies():
+    loaded = _importtime("import generator.site_builder")
+    assert [m for m in HEAVY if m in loaded] == []
+
+
+def test_site_builder_import_budget():
+    best = min(_importtime("import generator.site_builder")["generator.site_builder"] for _ in range(3))
+    assert best < BUDGET_US, f"import generator.site_builder took {best / 1000:.1f} ms"
+
+
+def test_lazy_exports_resolve():
+    import generator
+    from generator.site_builder import SiteBuilder
+
+    assert generator.SiteBuilder is SiteBuilder
+    assert set(generator.__all__) <= set(dir(generator))
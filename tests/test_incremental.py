@@ -0,0 +1,75 @@
+import io
+import shutil
+
+from generator.context import ContextCache
+from generator.feeds import FeedCache
+from generator.incremental import RenderCache
+from generator.registry import TEMPLATES_PATH, TemplateRegistry
+from generator.site_builder import SiteBuilder
+
+
+def _builder():
+    return SiteBuilder(context_cache=ContextCache(), render_cache=RenderCache())
+
+
+def test_dependencies_cover_style_and_legal_inputs():
+    deps = _builder().dependencies()
+    assert {"p_color", "biz_phone"} <= set(deps["index.html"])
+    # legal texts are linked from the footer, not embedded in every page
+    assert "terms_body" not in deps["index.html"]
+    assert deps["privacy.html"] == ["border_rad", "p_color", "priv_body", "s_color"]
+    assert deps["robots.txt"] == ["prod_url"]
+    assert "sheet_url" in deps["products/page-N.html"]
+
+
+def test_stylesheet_inputs_follow_the_css_template(tmp_path):
+    templates = tmp_path / "templates"
+    shutil.copytree(TEMPLATES_PATH, templates)
+    with open(templates / "partials" / "site.css.j2", "a", encoding="utf-8") as fh:
+        fh.write("\nh1 { font-family: {{ h_font }}; }\n")
+    registry = TemplateRegistry(str(templates), cache_dir=str(tmp_path / "jinja"))
+    builder = SiteBuilder(context_cache=ContextCache(), render_cache=RenderCache(), templates=registry)
+    deps = builder.dependencies()
+    assert deps["privacy.html"] == ["border_rad", "h_font", "p_color", "priv_body", "s_color"]
+    assert "h_font" in builder._preview_inputs["terms.html"]
+
+
+def test_edit_rerenders_only_affected_pages():
+    builder = _builder()
+    ctx = {"biz_name": "Test Co", "priv_body": "Old", "terms_body": "Old"}
+    builder.build_zip(ctx, io.BytesIO())
+    before = builder.render_cache.stats()["misses"]
+    fp = builder.export_fingerprint(ctx)
+
+    builder.build_zip(dict(ctx, priv_body="New"), io.BytesIO())
+    # only privacy.html reads the privacy text; every other page is reused
+    assert builder.render_cache.stats()["misses"] - before == 1
+
+    assert builder.export_fingerprint(dict(ctx, p_color="#ff0000")) != fp
+    assert builder.export_fingerprint(dict(ctx, biz_hours="unused")) == fp
+
+
+def test_preview_is_keyed_on_the_fields_a_page_reads():
+    builder = _builder()
+    ctx = {"biz_name": "Test Co", "priv_body": "Old"}
+    html = builder.preview("index.html", ctx)
+    misses = builder.context_cache.misses
+    # an unused field: served from the preview cache without sanitizing again
+    assert builder.preview("index.html", dict(ctx, biz_hours="Mon-Fri")) == html
+    assert builder.context_cache.misses == misses
+    assert "New Co" in builder.preview("index.html", dict(ctx, biz_name="New Co"))
+
+
+def test_preview_follows_feed_changes(tmp_path, sheet_server):
+    sheet_server.feeds["/s.csv"] = "name,price\nRose,10\n"
+    # revalidate on every use; sanitized contexts stay memoized for minutes
+    builder = SiteBuilder(
+        context_cache=ContextCache(), render_cache=RenderCache(), feed_cache=FeedCache(cache_dir=str(tmp_path), ttl=0)
+    )
+    ctx = {"biz_name": "Test Co", "sheet_url": sheet_server.url("/s.csv")}
+    assert "Rose" in builder.preview("index.html", ctx)
+
+    sheet_server.feeds["/s.csv"] = "name,price\nTulip,20\n"
+    html = builder.preview("index.html", ctx)
+    assert "Tulip" in html and "Rose" not in html
+    assert builder.render_page("index.html", ctx) == html
@@ -0,0 +1,37 @@
+import io
+import json
+
+from generator.context import ContextCache
+from generator.incremental import RenderCache
+from generator.metrics import MetricsCollector, observing
+from generator.site_builder import SiteBuilder
+
+
+def test_collector_records_every_stage_of_an_export(sheet_server):
+    sheet_server.feeds["/s.csv"] = "name,price\nRose,10\nLily,20\n"
+    builder = SiteBuilder(context_cache=ContextCache(), render_cache=RenderCache())
+    collector = MetricsCollector()
+    with observing(collector):
+        builder.build_zip({"biz_name": "Test Co", "sheet_url": sheet_server.url("/s.csv")}, io.BytesIO())
+
+    stages = {row["stage"]: row for row in collector.breakdown()}
+    assert list(stages) == ["sanitize", "fetch", "parse", "fragment", "render", "postprocess", "zip_write", "build"]
+    # every rendered file plus the extracted stylesheet and the sitemap is post-processed before zipping
+    assert stages["postprocess"]["calls"] == stages["render"]["calls"] + 2
+    assert stages["postprocess"]["bytes"] < stages["postprocess"]["bytes_before"]
+    assert stages["zip_write"]["bytes"] > 0
+    assert sum(e.get("products", 0) for e in collector.events if e["stage"] == "parse") == 4
+
+    # totals are per stage (bounded), per-file detail stays in the capped events
+    assert set(collector.totals) == set(stages)
+    assert collector.totals["render"]["calls"] == stages["render"]["calls"]
+    assert "index.html" in {e.get("file") for e in collector.events if e["stage"] == "render"}
+    prom = collector.to_prometheus()
+    assert 'titan_stage_seconds_total{stage="render"}' in prom and "file=" not in prom
+    assert json.loads(collector.to_json())["breakdown"]
+
+
+def test_no_observer_means_no_events():
+    collector = MetricsCollector()
+    SiteBuilder(context_cache=ContextCache()).render_home({"biz_name": "X"})
+    assert collector.events == []
@@ -0,0 +1,52 @@
+import io
+import zipfile
+
+from generator.context import ContextCache
+from generator.incremental import RenderCache
+from generator.postprocess import minify_css, minify_html, optimize_file
+from generator.site_builder import SiteBuilder
+
+
+def test_minify_html_leaves_script_pre_and_attributes_alone():
+    html = (
+        "<div class='a  b'>\n   Hello   <b>world</b>  <!-- note -->\n</div>\n"
+        "<pre>  keep\n   this </pre><script>var  s = '  x  ';\n</script>"
+        "<style> a { color : red ; } </style>"
+    )
+    out = minify_html(html)
+    assert "<div class='a  b'> Hello <b>world</b> </div>" in out
+    assert "<pre>  keep\n   this </pre>" in out
+    assert "<script>var  s = '  x  ';\n</script>" in out
+    assert "<style>a{color:red}</style>" in out
+    assert "note" not in out
+
+
+def test_minify_css_keeps_selectors_and_media_queries():
+    css = "/* x */ .nav a:hover , .btn > span { margin : 0 auto; }\n@media (max-width: 720px) { h1 { font-size: 2rem; } }"
+    assert minify_css(css) == ".nav a:hover,.btn>span{margin:0 auto}@media (max-width:720px){h1{font-size:2rem}}"
+
+
+def test_optimize_file_adds_gzip_sibling_only_for_text():
+    outputs, before = optimize_file("index.html", "<p>" + "hello   world " * 100 + "</p>")
+    names = [n for n, _ in outputs]
+    assert names[:2] == ["index.html", "index.html.gz"]
+    assert len(outputs[0][1]) < before
+    assert [n for n, _ in optimize_file("a.webp", b"\x00" * 1000)[0]] == ["a.webp"]
+
+
+def test_export_links_one_hashed_stylesheet():
+    builder = SiteBuilder(context_cache=ContextCache(), render_cache=RenderCache())
+    buf = io.BytesIO()
+    builder.build_zip({"biz_name": "Test Co", "p_color": "#123456"}, buf)
+    with zipfile.ZipFile(buf) as zf:
+        names = zf.namelist()
+        css = [n for n in names if n.startswith("assets/site.") and n.endswith(".css")]
+        assert len(css) == 1
+        assert "#123456" in zf.read(css[0]).decode("utf-8")
+        index = zf.read("index.html").decode("utf-8")
+        assert css[0] in index and "<style>" not in index
+        assert css[0] in zf.read("privacy.html").decode("utf-8")
+        assert "index.html.gz" in names
+        assert zf.getinfo("index.html.gz").compress_type == zipfile.ZIP_STORED
+    # the live preview keeps its CSS inline
+    assert "<style>" in builder.render_home({"biz_name": "Test Co", "p_color": "#123456"})
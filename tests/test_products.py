@@ -0,0 +1,103 @@
+import io
+import tracemalloc
+import zipfile
+
+import pytest
+
+from generator.context import ContextCache
+from generator.metrics import MetricsCollector, observing
+from generator.products import Product, ProductTable, iter_products, paginate
+from generator.site_builder import SiteBuilder
+
+
+def test_iter_products_sniffs_pipe_delimiter_and_skips_header():
+    stream = io.StringIO("Name|Price|Desc|Img\nRose|₹1,200|Red|\n\nLily|₹90\n")
+    assert list(iter_products(stream)) == [
+        {"name": "Rose", "price": "₹1,200", "desc": "Red", "img": ""},
+        {"name": "Lily", "price": "₹90", "desc": "", "img": ""},
+    ]
+
+
+def test_product_table_is_compact_and_indexed():
+    table = ProductTable(iter_products(io.StringIO("name,price\nRose,\"₹1,200\"\nlily,₹90\nOrchid,on request\n9 Tulips,$5\n")))
+    assert table[1] == {"name": "lily", "price": "₹90", "desc": "", "img": ""}
+    assert table[1].name == "lily" and table[1].amount == 90.0 and table[2].amount is None
+    assert [p.name for p in table.sorted_by_price()] == ["9 Tulips", "lily", "Rose", "Orchid"]
+    assert [p.name for p in table.sorted_by_price(reverse=True)] == ["Rose", "lily", "9 Tulips", "Orchid"]
+    assert sorted(table.by_letter) == ["#", "L", "O", "R"] and [p.name for p in table.starting_with("l")] == ["lily"]
+    assert table.price_range() == (5.0, 1200.0)
+
+    csv_text = "name,price,desc,img\n" + "".join(f"Item {i},₹{i % 40 * 100},Fresh roses,https://cdn.test/{i % 20}.jpg\n" for i in range(20000))
+    tracemalloc.start()
+    try:
+        dicts = [dict(p) for p in iter_products(io.StringIO(csv_text))]
+        as_dicts = tracemalloc.get_traced_memory()[0]
+        del dicts
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        table = ProductTable(iter_products(io.StringIO(csv_text)))
+        as_table = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert len(table) == 20000 and isinstance(table[-1], Product)
+    assert as_table < as_dicts / 2
+
+
+def test_paginate_flags_last_page():
+    assert [(n, len(p), more) for n, p, more in paginate(range(5), 2)] == [(1, 2, True), (2, 2, True), (3, 1, False)]
+    assert list(paginate([], 2)) == []
+
+
+def test_build_zip_writes_paginated_inventory(sheet_server):
+    sheet_server.feeds["/big.csv"] = "name,price\n" + "".join(f"Item {i},{i}\n" for i in range(25))
+    builder = SiteBuilder(context_cache=ContextCache(), page_size=10)
+    ctx = {"biz_name": "Test Co", "sheet_url": sheet_server.url("/big.csv")}
+
+    home = builder.render_home(ctx)
+    assert "Item 9" in home and "Item 10" not in home
+    assert "products/page-1.html" in home
+
+    buf = io.BytesIO()
+    builder.build_zip(ctx, buf)
+    with zipfile.ZipFile(buf) as zf:
+        pages = sorted(n for n in zf.namelist() if n.startswith("products/") and n.endswith(".html"))
+        assert pages == ["products/page-1.html", "products/page-2.html", "products/page-3.html"]
+        last = zf.read("products/page-3.html").decode("utf-8")
+    assert "Item 24" in last and "page-2.html" in last and "page-4.html" not in last
+    assert "Inventory - Page 3" in last
+    assert sheet_server.requests == 1
+
+
+def test_errors_after_the_first_inventory_page_fail_the_export(sheet_server, monkeypatch):
+    sheet_server.feeds["/big.csv"] = "name,price\n" + "".join(f"Item {i},{i}\n" for i in range(25))
+    builder = SiteBuilder(context_cache=ContextCache(), page_size=10)
+    ctx = {"biz_name": "Test Co", "sheet_url": sheet_server.url("/big.csv"), "product_pages": True}
+    with_urls = SiteBuilder._with_detail_urls
+
+    def failing(products, offset=0):
+        if offset:
+            raise RuntimeError("render failed on page 2")
+        return with_urls(products, offset)
+
+    monkeypatch.setattr(SiteBuilder, "_with_detail_urls", staticmethod(failing))
+    with pytest.raises(RuntimeError, match="page 2"):
+        builder.build_zip(ctx, io.BytesIO())
+
+    # a feed that cannot be fetched still exports the site without inventory pages
+    buf = io.BytesIO()
+    builder.build_zip(dict(ctx, sheet_url=sheet_server.url("/missing.csv")), buf)
+    with zipfile.ZipFile(buf) as zf:
+        assert "index.html" in zf.namelist()
+        assert not [n for n in zf.namelist() if n.startswith("products/page-")]
+
+
+def test_resanitizing_reuses_the_parsed_first_page(sheet_server):
+    sheet_server.feeds["/head.csv"] = "name,price\nRose,10\nLily,20\n"
+    builder = SiteBuilder(context_cache=ContextCache())
+    ctx = {"biz_name": "Test Co", "sheet_url": sheet_server.url("/head.csv")}
+    first = builder._sanitize_context(ctx)
+    collector = MetricsCollector()
+    with observing(collector):
+        again = builder._sanitize_context(dict(ctx, biz_hours="Mon-Fri"))
+    assert again["products"] == first["products"] and len(first["products"]) == 2
+    assert not [e for e in collector.events if e["stage"] == "parse"]
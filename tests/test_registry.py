@@ -0,0 +1,41 @@
+from generator.registry import TemplateRegistry
+
+
+def test_registry_resolves_fallbacks_and_reuses_bytecode(tmp_path):
+    first = TemplateRegistry(cache_dir=str(tmp_path)).warm()
+    assert first.resolved["contact"] == "about.html.j2"
+    assert first.get("contact") is first.get("about")
+    assert first.stats()["bytecode_misses"] > 0
+
+    second = TemplateRegistry(cache_dir=str(tmp_path)).warm()
+    stats = second.stats()
+    assert stats["bytecode_misses"] == 0 and stats["bytecode_hits"] == stats["templates"]
+
+
+def test_chrome_fragments_render_once_per_site_and_track_their_fields(tmp_path):
+    from generator.context import ContextCache
+    from generator.incremental import RenderCache
+    from generator.site_builder import SiteBuilder
+
+    fragments = RenderCache()
+    registry = TemplateRegistry(cache_dir=str(tmp_path), fragment_cache=fragments)
+    builder = SiteBuilder(context_cache=ContextCache(), render_cache=RenderCache(), templates=registry)
+    assert {"biz_logo", "biz_addr", "layout_dna"} <= set(builder.dependencies()["index.html"])
+    assert "fragment" not in builder.dependencies()["index.html"]
+
+    ctx = {"biz_name": "Test Co", "biz_phone": "+91 1", "biz_addr": "Main Road"}
+    pages = [builder.render_page(n, ctx) for n in ("index.html", "about.html", "contact.html")]
+    # nav + footer for three pages and one hero: three renders, the rest reused
+    assert fragments.stats() == {"size": 3, "hits": 4, "misses": 3}
+    assert all("Main Road" in html for html in pages)
+
+    # another site with the same chrome fields reuses every fragment
+    builder.render_page("about.html", dict(ctx, about_txt="<p>Different</p>"))
+    assert fragments.stats()["misses"] == 3
+
+
+def test_site_builder_keeps_its_module_level_names():
+    from generator import registry, site_builder
+
+    assert site_builder.TEMPLATES_PATH == registry.TEMPLATES_PATH
+    assert site_builder.env is registry.default_registry().env
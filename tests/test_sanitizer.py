@@ -0,0 +1,27 @@
+import bleach
+
+from generator.sanitizer import ALLOWED_ATTRS, ALLOWED_TAGS, clean_html, clean_many, clean_stats
+
+
+def _reference(value):
+    return bleach.clean(value, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRS, strip=True)
+
+
+def test_clean_html_matches_bleach():
+    for value in ['plain ₹1,200 "quoted"', "a & b", "<p>ok</p><script>x</script>", "x\r\ny", '<a href="/" onclick="x">k</a>']:
+        assert clean_html(value) == _reference(value)
+
+
+def test_clean_html_skips_plain_text_and_recleaning():
+    before = clean_stats()
+    assert clean_html("Just text") == "Just text"
+    cleaned = clean_html("<b>bold</b><img src=x onerror=y>")
+    assert clean_html(cleaned) == cleaned
+    after = clean_stats()
+    assert after["plain"] == before["plain"] + 1
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 1
+
+
+def test_clean_many_preserves_order():
+    assert clean_many(["<i>a</i>", "b", "<i>a</i>"]) == ["<i>a</i>", "b", "<i>a</i>"]
@@ -0,0 +1,101 @@
+import http.client
+import io
+import json
+import zipfile
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from generator.artifacts import ArtifactStore
+from generator.service import RenderService
+
+
+def _post(url, payload):
+    req = Request(url, data=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"})
+    with urlopen(req, timeout=30) as resp:
+        return resp.status, resp.headers, resp.read()
+
+
+def _connect(service):
+    host, port = service.httpd.server_address[:2]
+    return http.client.HTTPConnection(host, port, timeout=30)
+
+
+@pytest.fixture(scope="module")
+def service(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as mp:
+        # worker processes build their own default feed cache
+        mp.setenv("TITAN_FEED_CACHE_DIR", str(tmp_path_factory.mktemp("service-feeds")))
+        store = ArtifactStore(str(tmp_path_factory.mktemp("service-artifacts")))
+        with RenderService(port=0, workers=1, queue_size=1, artifacts=store) as svc:
+            yield svc
+
+
+def test_render_zip_and_products(service, sheet_server):
+    status, headers, body = _post(service.url("/render/index.html"), {"biz_name": "Service Co"})
+    assert status == 200 and headers["Content-Type"].startswith("text/html")
+    assert b"Service Co" in body
+
+    status, headers, body = _post(service.url("/zip"), {"biz_name": "Service Co"})
+    assert headers["Content-Type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(body)) as zf:
+        assert "index.html" in zf.namelist()
+    # built once into the shared store; the same site is streamed from it again
+    assert service.artifacts.stats()["entries"] == 1
+    assert _post(service.url("/zip"), {"biz_name": "Service Co"})[2] == body
+    assert service.artifacts.stats()["entries"] == 1
+
+    sheet_server.feeds["/svc.csv"] = "name,price\n" + "".join(f"Item {i},{i}\n" for i in range(5))
+    _, _, body = _post(service.url("/products"), {"sheet_url": sheet_server.url("/svc.csv"), "offset": 1, "limit": 2})
+    data = json.loads(body)
+    assert [p["name"] for p in data["products"]] == ["Item 1", "Item 2"] and data["more"]
+
+
+def test_errors_and_backpressure(service):
+    with pytest.raises(HTTPError) as err:
+        _post(service.url("/render/missing.html"), {})
+    assert err.value.code == 404
+
+    # every admission slot taken: new work is rejected instead of queued
+    slots = [service._slots.acquire(blocking=False) for _ in range(service.workers + service.queue_size)]
+    try:
+        with pytest.raises(HTTPError) as err:
+            _post(service.url("/render/index.html"), {})
+        assert err.value.code == 503 and err.value.headers["Retry-After"] == "1"
+    finally:
+        for taken in slots:
+            if taken:
+                service._slots.release()
+    assert service.stats()["rejected"] == 1
+
+
+def test_malformed_content_length_is_rejected(service):
+    for length in ("abc", "-5"):
+        conn = _connect(service)
+        try:
+            conn.putrequest("POST", "/render/index.html")
+            conn.putheader("Content-Length", length)
+            conn.endheaders()
+            resp = conn.getresponse()
+            assert resp.status == 400 and json.loads(resp.read())["error"] == "invalid Content-Length"
+            assert resp.getheader("Connection") == "close"
+        finally:
+            conn.close()
+
+
+def test_rejected_posts_keep_the_connection_in_sync(service):
+    conn = _connect(service)
+    try:
+        statuses, sockets = [], set()
+        for path in ("/render/missing.html", "/nowhere", "/render/index.html"):
+            conn.request("POST", path, body=json.dumps({"biz_name": "Kept Alive"}))
+            sockets.add(id(conn.sock))
+            resp = conn.getresponse()
+            body = resp.read()
+            statuses.append(resp.status)
+        # one connection throughout: each request was parsed from where the last body ended
+        assert statuses == [404, 404, 200] and len(sockets) == 1
+        assert b"Kept Alive" in body
+    finally:
+        conn.close()
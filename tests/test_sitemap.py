@@ -0,0 +1,124 @@
+import io
+import tracemalloc
+import zipfile
+from xml.etree import ElementTree
+
+from generator.context import ContextCache
+from generator.site_builder import SiteBuilder
+from generator.sitemap import SITEMAP, LastmodHistory, SitemapWriter
+
+NS = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
+
+
+def _locs(xml, tag="url"):
+    root = ElementTree.fromstring(xml)
+    return [(e.findtext("sm:loc", namespaces=NS), e.findtext("sm:lastmod", namespaces=NS)) for e in root.findall(f"sm:{tag}", NS)]
+
+
+def test_single_file_until_the_limit_then_shards_and_an_index(tmp_path):
+    history = LastmodHistory(today="2026-01-01")
+    small = SitemapWriter("https://x.test/", history, max_urls=3)
+    files = [f for page in ("index.html", "about.html") for f in small.add(page, page)]
+    files += small.finish()
+    assert [name for name, _ in files] == [SITEMAP]
+    assert _locs(files[0][1]) == [("https://x.test/index.html", "2026-01-01"), ("https://x.test/about.html", "2026-01-01")]
+
+    # a later export keeps the date of unchanged pages and bumps changed ones
+    big = SitemapWriter("https://x.test/", LastmodHistory(history.current, today="2026-02-01"), max_urls=3)
+    pages = [("index.html", "index.html"), ("about.html", "about v2")] + [(f"p{i}.html", str(i)) for i in range(5)]
+    files = [f for path, content in pages for f in big.add(path, content)]
+    assert [name for name, _ in files] == ["sitemap-1.xml", "sitemap-2.xml"]  # emitted while streaming
+    files += big.finish()
+    names = dict(files)
+    assert list(names) == ["sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml", SITEMAP]
+    assert _locs(names["sitemap-1.xml"])[:2] == [
+        ("https://x.test/index.html", "2026-01-01"),
+        ("https://x.test/about.html", "2026-02-01"),
+    ]
+    assert [loc for loc, _ in _locs(names[SITEMAP], "sitemap")] == [f"https://x.test/sitemap-{n}.xml" for n in (1, 2, 3)]
+
+    # without a history there is no lastmod
+    plain = SitemapWriter("https://x.test/")
+    assert _locs(dict(list(plain.add("index.html", "x")) + list(plain.finish()))[SITEMAP]) == [("https://x.test/index.html", None)]
+
+
+def test_zip_exports_do_not_depend_on_build_history(tmp_path):
+    ctx = {"biz_name": "Same Co", "prod_url": "https://same.test/"}
+    first, second = io.BytesIO(), io.BytesIO()
+    SiteBuilder(context_cache=ContextCache()).build_zip(ctx, first)
+    # another builder after a deploy of the same site (which records lastmod history)
+    other = SiteBuilder(context_cache=ContextCache())
+    other.deploy_dir(ctx, str(tmp_path / "live"))
+    other.build_zip(ctx, second)
+    assert first.getvalue() == second.getvalue()
+    with zipfile.ZipFile(first) as zf:
+        assert all(day is None for _, day in _locs(zf.read(SITEMAP)))
+
+
+def test_deploys_keep_lastmod_per_target(tmp_path, monkeypatch):
+    from generator import sitemap
+
+    builder = SiteBuilder(context_cache=ContextCache())
+    ctx = {"biz_name": "Dated Co"}  # no prod_url: each target still keeps its own history
+
+    class Day(sitemap.datetime.date):
+        value = "2026-01-01"
+
+        @classmethod
+        def today(cls):
+            return cls.fromisoformat(cls.value)
+
+    monkeypatch.setattr(sitemap.datetime, "date", Day)
+
+    def lastmod(path, page):
+        with open(tmp_path / path / SITEMAP) as fh:
+            return dict(_locs(fh.read()))[page]
+
+    builder.deploy_dir(ctx, str(tmp_path / "a"))
+    Day.value = "2026-02-01"
+    builder.deploy_dir(dict(ctx, priv_body="v2"), str(tmp_path / "a"))
+    builder.deploy_dir(ctx, str(tmp_path / "b"))
+    assert lastmod("a", "index.html") == "2026-01-01" and lastmod("a", "privacy.html") == "2026-02-01"
+    assert lastmod("b", "index.html") == "2026-02-01"
+
+
+def test_detail_pages_are_streamed_linked_and_listed(sheet_server):
+    sheet_server.feeds["/shop.csv"] = "name,price,desc\n" + "".join(f"Rose & Co {i},{i},Red\n" for i in range(25))
+    builder = SiteBuilder(context_cache=ContextCache(), page_size=10)
+    ctx = {"biz_name": "Test Co", "prod_url": "https://x.test", "sheet_url": sheet_server.url("/shop.csv"), "product_pages": True}
+    buf = io.BytesIO()
+    builder.build_zip(ctx, buf)
+    with zipfile.ZipFile(buf) as zf:
+        names = zf.namelist()
+        detail = zf.read("products/items/25-rose-co-24.html").decode("utf-8")
+        index = zf.read("index.html").decode("utf-8")
+        locs = [loc for loc, _ in _locs(zf.read(SITEMAP))]
+    items = [n for n in names if n.startswith("products/items/") and n.endswith(".html")]
+    assert len(items) == 25 and items[0] == "products/items/1-rose-co-0.html"
+    # each inventory page is followed by its products' detail pages
+    assert names.index("products/page-1.html") < names.index(items[0]) < names.index("products/page-2.html")
+    assert "<h1 style=\"margin-top:0;color:var(--p)\">Rose & Co 24</h1>" in detail and 'href="https://x.test/products/items/25-rose-co-24.html"' in detail
+    assert '"@type": "Product"' in detail and 'href="../page-3.html"' in detail
+    assert 'href="products/items/1-rose-co-0.html"' in index
+    assert "https://x.test/products/items/25-rose-co-24.html" in locs and "https://x.test/404.html" not in locs
+    assert names[-1] == SITEMAP or names[-1].startswith(SITEMAP)
+
+    # off by default; the fingerprint tells the two exports apart
+    assert builder.export_fingerprint(ctx) != builder.export_fingerprint(dict(ctx, product_pages=False))
+
+
+def test_large_catalog_exports_in_bounded_memory(sheet_server):
+    sheet_server.feeds["/big.csv"] = "name,price\n" + "".join(f"Item {i},{i}\n" for i in range(4000))
+    builder = SiteBuilder(context_cache=ContextCache(), optimize_output=False, zip_workers=1)
+    ctx = {"biz_name": "Big Co", "prod_url": "https://x.test/", "sheet_url": sheet_server.url("/big.csv"), "product_pages": True}
+    ctx = builder._sanitize_context(ctx)
+    tracemalloc.start()
+    try:
+        total = sum(len(content) for _, content in builder._iter_files(ctx))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # pages are produced one inventory page at a time; what remains is per-product
+    # bookkeeping (sitemap shard, catalog index), a small fraction of the output
+    assert total > 20 * 1024 * 1024
+    assert peak < total / 5
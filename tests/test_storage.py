@@ -0,0 +1,32 @@
+import hashlib
+import os
+
+import pytest
+
+from generator.storage import atomic_file, atomic_write, default_cache_dir
+
+
+def test_atomic_file_replaces_only_on_success(tmp_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    target = out / "data.bin"
+    atomic_write(str(target), b"old")
+    with pytest.raises(RuntimeError):
+        with atomic_file(str(target)) as fh:
+            fh.write(b"partial")
+            raise RuntimeError("writer failed")
+    assert target.read_bytes() == b"old" and os.listdir(out) == ["data.bin"]
+
+    # the name can depend on what was written
+    digest = hashlib.sha256()
+    with atomic_file(lambda: str(out / digest.hexdigest()[:8]), dir=str(out)) as fh:
+        fh.write(b"new")
+        digest.update(b"new")
+    assert (out / hashlib.sha256(b"new").hexdigest()[:8]).read_bytes() == b"new"
+
+
+def test_default_cache_dir(monkeypatch):
+    monkeypatch.delenv("TITAN_TEST_DIR", raising=False)
+    assert default_cache_dir("TITAN_TEST_DIR", "things").endswith(os.path.join(".cache", "titan", "things"))
+    monkeypatch.setenv("TITAN_TEST_DIR", "/srv/things")
+    assert default_cache_dir("TITAN_TEST_DIR", "things") == "/srv/things"